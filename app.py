@@ -12,15 +12,49 @@ Módulo de imágenes v3.0+:
 - Fusion Engine (decisión jerárquica)
 """
 
+from __future__ import annotations
+
+import os
+import sys
+import time
+import types
+import wave
+import asyncio
 import logging
-from typing import Optional, Tuple
-from PIL import Image
-
+import tempfile
+import threading
+import contextlib
+import contextvars
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+
+import jinja2
+import numpy as np
+import torch
 import gradio as gr
 
+if TYPE_CHECKING:
+    from PIL import Image
+
 # Importar configuración
 import config
 
+# ==========================================
+# 💾 Caché persistente de modelos
+# ==========================================
+# Debe configurarse antes de importar los módulos que usan HuggingFace.
+# Tras un primer precalentamiento exitoso se trabaja offline con la caché local.
+_WARMED_SENTINEL = config.MODEL_CACHE_DIR / ".warmed"
+os.environ.setdefault("HF_HUB_CACHE", str(config.MODEL_CACHE_DIR / "hf"))
+if _WARMED_SENTINEL.exists():
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+# Hilos y cuDNN: antes de cualquier operación de PyTorch
+from core.model_manager import configurar_runtime
+configurar_runtime()
+
 # Importar módulos de análisis
 from modules.image_forensics import ImageForensicsDetector
 from modules.video_forensics import VideoForensicsDetector
@@ -36,6 +70,8 @@ from utils.file_handlers import (
     generar_reporte_error,
     Timer,
 )
+from utils.cache import LRUCache, hash_array, hash_file
+from utils.batcher import MicroBatcher
 from utils.plotting import generar_grafico_temporal
 
 # ==========================================
@@ -54,18 +90,151 @@ logger.info("=" * 60)
 logger.info("🚀 UIDE Forense AI 3.0+ - Iniciando Sistema")
 logger.info("=" * 60)
 
-# Los modelos se cargan bajo demanda (lazy loading)
-image_detector = ImageForensicsDetector()
-video_detector = VideoForensicsDetector()
-audio_detector = AudioForensicsDetector()
+# Los modelos se cargan bajo demanda (lazy loading).
+# Las instancias se guardan en sys.modules para que el modo reload de
+# Gradio (que re-importa este archivo) reutilice los modelos ya cargados.
+_singletons = sys.modules.setdefault("_uide_singletons", types.ModuleType("_uide_singletons"))
+if not hasattr(_singletons, "image_detector"):
+    _singletons.image_detector = ImageForensicsDetector()
+    _singletons.video_detector = VideoForensicsDetector()
+    _singletons.audio_detector = AudioForensicsDetector()
+
+image_detector = _singletons.image_detector
+video_detector = _singletons.video_detector
+audio_detector = _singletons.audio_detector
 
 logger.info("✅ Detectores inicializados (modelos: lazy loading)")
 
+# Cachés de resultados indexadas por hash de contenido (re-envíos del mismo archivo)
+_IMG_CACHE = LRUCache(config.RESULT_CACHE_SIZE)
+_AUDIO_CACHE = LRUCache(config.RESULT_CACHE_SIZE)
+_VIDEO_CACHE = LRUCache(config.RESULT_CACHE_SIZE)
+_CACHE_MAX_BYTES = config.RESULT_CACHE_MAX_MB * 1024 * 1024
+
+# Solicitudes de imagen concurrentes se agrupan en un solo forward
+_image_batcher = MicroBatcher(
+    image_detector.analyze_batch,
+    max_batch=config.IMAGE_BATCH_MAX,
+    window_ms=config.IMAGE_BATCH_WINDOW_MS,
+)
+
+
+def _warmup() -> None:
+    """
+    Ejecuta una pasada en vacío por cada detector para que la primera
+    solicitud real encuentre los modelos ya cargados.
+    """
+    logger.info("🔥 Precalentando detectores...")
+    
+    modelos_ok = True
+
+    try:
+        resultado = image_detector.analyze_dict(np.zeros((224, 224, 3), dtype=np.uint8))
+        modelos_ok = resultado.get("verdict") != "ERROR"
+    except Exception as e:
+        modelos_ok = False
+        logger.warning("⚠️ Precalentamiento de imagen falló: %s", e)
+
+    try:
+        video_detector.warmup()
+    except Exception as e:
+        modelos_ok = False
+        logger.warning("⚠️ Precalentamiento de video falló: %s", e)
+
+    # 1 segundo de silencio como WAV temporal
+    fd, wav_path = tempfile.mkstemp(suffix=".wav")
+    try:
+        with os.fdopen(fd, "wb") as f, wave.open(f, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(config.AUDIO_SAMPLE_RATE)
+            wav.writeframes(b"\x00\x00" * config.AUDIO_SAMPLE_RATE)
+        audio_detector.predict(wav_path)
+    except Exception as e:
+        logger.warning("⚠️ Precalentamiento de audio falló: %s", e)
+    finally:
+        os.remove(wav_path)
+
+    # Los siguientes arranques pueden evitar las consultas al hub
+    if modelos_ok and not _WARMED_SENTINEL.exists():
+        try:
+            config.MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            _WARMED_SENTINEL.touch()
+        except OSError as e:
+            logger.warning("⚠️ No se pudo escribir la marca de caché: %s", e)
+
+    logger.info("✅ Detectores precalentados")
+
+
+# Los workers "spawn" re-importan este módulo: solo precalienta el proceso principal
+if config.WARMUP_ON_START and multiprocessing.parent_process() is None:
+    threading.Thread(target=_warmup, name="uide-warmup", daemon=True).start()
+
 
 # ==========================================
 # 🎨 Generación de Reportes HTML
 # ==========================================
 
+# Plantilla del reporte de imagen: se compila una única vez al importar.
+# autoescape protege los campos de texto libre (evidencia, notas).
+# Los estilos viven en `css_custom`; solo los colores dinámicos van como variables CSS.
+_REPORTE_IMAGEN_TPL = jinja2.Environment(autoescape=True).from_string("""
+<div class="uide-report">
+    <div class="uide-verdict-hdr" style="--v-color: {{ color }}; --v-bg: {{ bg_color }}; --v-border: {{ border_color }};">
+        <span class="uide-emoji">{{ emoji }}</span>
+        <div>
+            <h2>{{ verdict }}</h2>
+            <p>Confianza: <strong>{{ confidence }}</strong></p>
+        </div>
+    </div>
+    <div class="uide-card">
+        <h3>📊 Análisis por Experto</h3>
+        {% for row in scores %}
+        <div class="uide-score-row" style="--bar-color: {{ row.bar_color }}; --bar-width: {{ row.percent }}%;">
+            <div class="uide-score-label"><span>{{ row.expert }}</span><span>{{ "%.1f"|format(row.percent) }}%</span></div>
+            <div class="uide-bar"><div class="uide-bar-fill"></div></div>
+        </div>
+        {% endfor %}
+    </div>
+    <div class="uide-card">
+        <h3>🔍 Evidencia Forense</h3>
+        <ul class="uide-evidence">
+            {% for item in evidence %}<li>{{ item }}</li>{% endfor %}
+        </ul>
+    </div>
+    <div class="uide-card uide-notes">
+        <h3>💡 Interpretación</h3>
+        <p>{{ notes }}</p>
+    </div>
+    <div class="uide-meta">
+        <span>📐 {{ ancho }} × {{ alto }} px</span>
+        <span>⏱️ {{ "%.2f"|format(tiempo) }}s</span>
+        <span>🔬 Módulo v3.0+</span>
+    </div>
+</div>
+""")
+
+
+# Estilo por tipo de veredicto: (color, emoji, fondo, borde)
+_VERDICT_STYLE = {
+    "IA": ("#ef4444", "🚨", "#fef2f2", "#fca5a5"),              # Rojo
+    "REAL": ("#22c55e", "✅", "#f0fdf4", "#86efac"),            # Verde
+    "NO CONCLUYENTE": ("#f59e0b", "⚠️", "#fffbeb", "#fcd34d"),  # Ámbar
+    "DEFAULT": ("#6b7280", "❓", "#f9fafb", "#d1d5db"),         # Gris
+}
+
+
+def _clasificar_veredicto(verdict: str) -> str:
+    """Retorna la clave de `_VERDICT_STYLE` correspondiente al veredicto."""
+    if "IA" in verdict or "GENERADA" in verdict:
+        return "IA"
+    if "REAL" in verdict:
+        return "REAL"
+    if "NO CONCLUYENTE" in verdict:
+        return "NO CONCLUYENTE"
+    return "DEFAULT"
+
+
 def generar_reporte_imagen_forense(resultado: dict, ancho: int, alto: int, tiempo: float) -> str:
     """
     Genera un reporte HTML forense detallado para el análisis de imagen.
@@ -86,107 +255,121 @@ def generar_reporte_imagen_forense(resultado: dict, ancho: int, alto: int, tiemp
     notes = resultado.get("notes", "")
     
     # Determinar color y emoji según veredicto
-    if "IA" in verdict or "GENERADA" in verdict:
-        color = "#ef4444"  # Rojo
-        emoji = "🚨"
-        bg_color = "#fef2f2"
-        border_color = "#fca5a5"
-    elif "REAL" in verdict:
-        color = "#22c55e"  # Verde
-        emoji = "✅"
-        bg_color = "#f0fdf4"
-        border_color = "#86efac"
-    elif "NO CONCLUYENTE" in verdict:
-        color = "#f59e0b"  # Ámbar
-        emoji = "⚠️"
-        bg_color = "#fffbeb"
-        border_color = "#fcd34d"
-    else:
-        color = "#6b7280"  # Gris
-        emoji = "❓"
-        bg_color = "#f9fafb"
-        border_color = "#d1d5db"
+    color, emoji, bg_color, border_color = _VERDICT_STYLE[_clasificar_veredicto(verdict)]
     
-    # Generar barras de scores
-    scores_html = ""
-    for expert, score in scores.items():
-        percent = score * 100
-        bar_color = "#ef4444" if percent > 50 else "#22c55e"
-        scores_html += f"""
-        <div style="margin: 8px 0;">
-            <div style="display: flex; justify-content: space-between; margin-bottom: 4px;">
-                <span style="font-weight: 500;">{expert}</span>
-                <span style="font-weight: 600; color: {bar_color};">{percent:.1f}%</span>
-            </div>
-            <div style="background: #e5e7eb; border-radius: 4px; height: 8px; overflow: hidden;">
-                <div style="background: {bar_color}; height: 100%; width: {percent}%; transition: width 0.3s;"></div>
-            </div>
-        </div>
-        """
-    
-    # Generar lista de evidencia
-    evidence_html = ""
-    for item in evidence:
-        evidence_html += f'<li style="margin: 4px 0; color: #374151;">{item}</li>'
+    # Filas de scores: porcentajes y colores calculados en bloque con numpy
+    percents = np.fromiter(scores.values(), dtype=np.float64, count=len(scores)) * 100.0
+    colors = np.where(percents > 50.0, "#ef4444", "#22c55e")
+    score_rows = [
+        {"expert": expert, "percent": percent, "bar_color": bar_color}
+        for expert, percent, bar_color in zip(scores.keys(), percents.tolist(), colors.tolist())
+    ]
     
-    html = f"""
-    <div style="font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif; max-width: 600px;">
-        
-        <!-- Header con veredicto -->
-        <div style="background: {bg_color}; border: 2px solid {border_color}; border-radius: 12px; padding: 20px; margin-bottom: 16px;">
-            <div style="display: flex; align-items: center; gap: 12px;">
-                <span style="font-size: 2.5em;">{emoji}</span>
-                <div>
-                    <h2 style="margin: 0; color: {color}; font-size: 1.4em;">{verdict}</h2>
-                    <p style="margin: 4px 0 0 0; color: #6b7280;">Confianza: <strong>{confidence}</strong></p>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Scores de expertos -->
-        <div style="background: #f9fafb; border-radius: 12px; padding: 16px; margin-bottom: 16px;">
-            <h3 style="margin: 0 0 12px 0; color: #1f2937; font-size: 1.1em;">📊 Análisis por Experto</h3>
-            {scores_html}
-        </div>
-        
-        <!-- Evidencia forense -->
-        <div style="background: #f9fafb; border-radius: 12px; padding: 16px; margin-bottom: 16px;">
-            <h3 style="margin: 0 0 12px 0; color: #1f2937; font-size: 1.1em;">🔍 Evidencia Forense</h3>
-            <ul style="margin: 0; padding-left: 20px; font-size: 0.95em;">
-                {evidence_html}
-            </ul>
-        </div>
-        
-        <!-- Notas -->
-        <div style="background: #eff6ff; border-radius: 12px; padding: 16px; margin-bottom: 16px;">
-            <h3 style="margin: 0 0 8px 0; color: #1e40af; font-size: 1em;">💡 Interpretación</h3>
-            <p style="margin: 0; color: #1e3a8a; font-size: 0.95em;">{notes}</p>
-        </div>
-        
-        <!-- Metadatos -->
-        <div style="display: flex; gap: 16px; flex-wrap: wrap; font-size: 0.85em; color: #6b7280;">
-            <span>📐 {ancho} × {alto} px</span>
-            <span>⏱️ {tiempo:.2f}s</span>
-            <span>🔬 Módulo v3.0+</span>
-        </div>
-        
-    </div>
-    """
-    
-    return html
+    return _REPORTE_IMAGEN_TPL.render(
+        verdict=verdict,
+        confidence=confidence,
+        color=color,
+        emoji=emoji,
+        bg_color=bg_color,
+        border_color=border_color,
+        scores=score_rows,
+        evidence=evidence,
+        notes=notes,
+        ancho=ancho,
+        alto=alto,
+        tiempo=tiempo,
+    )
 
 
 # ==========================================
 # 🔍 Funciones de Análisis
 # ==========================================
 
-def analizar_imagen(imagen_input) -> str:
+_plot_pool: Optional[ProcessPoolExecutor] = None
+_plot_pool_lock = threading.Lock()
+
+
+def _get_plot_pool() -> ProcessPoolExecutor:
+    """
+    Retorna el pool de procesos para gráficos (se crea en el primer uso).
+    
+    matplotlib no libera el GIL durante el renderizado; en un proceso
+    aparte no bloquea la cola de Gradio.
+    """
+    global _plot_pool
+    with _plot_pool_lock:
+        if _plot_pool is None:
+            _plot_pool = ProcessPoolExecutor(
+                max_workers=config.PLOT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _plot_pool
+
+
+def _liberar_memoria_gpu() -> None:
+    """
+    Devuelve al driver los bloques CUDA reservados pero libres.
+    
+    Un video largo deja GB en la caché del allocator que otras pestañas
+    no pueden usar; se libera al terminar cada análisis de video.
+    """
+    if config.ENABLE_CACHE_CLEANING and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+        torch.cuda.ipc_collect()
+
+
+async def _iterar_en_hilo(gen: Iterator[Any], cancelar: threading.Event) -> AsyncIterator[Any]:
+    """
+    Consume un generador síncrono en un hilo y re-emite sus elementos.
+    
+    El generador (p. ej. el bucle de frames del detector de video) no
+    bloquea el event loop de Gradio; los elementos llegan por una cola.
+    El hilo corre en una copia del contexto actual para que gr.Progress
+    encuentre el evento de Gradio. Si el consumidor se cierra o se cancela,
+    se activa `cancelar` y el hilo deja de producir.
+    """
+    loop = asyncio.get_running_loop()
+    cola: asyncio.Queue = asyncio.Queue()
+    fin = object()
+    cerrado = threading.Event()
+    
+    def _producir() -> None:
+        try:
+            for item in gen:
+                if cerrado.is_set():
+                    break
+                loop.call_soon_threadsafe(cola.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(cola.put_nowait, e)
+        finally:
+            gen.close()
+            if not cerrado.is_set():
+                loop.call_soon_threadsafe(cola.put_nowait, fin)
+    
+    contexto = contextvars.copy_context()
+    hilo = threading.Thread(target=contexto.run, args=(_producir,), name="uide-stream", daemon=True)
+    hilo.start()
+    
+    try:
+        while True:
+            item = await cola.get()
+            if item is fin:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cerrado.set()
+        cancelar.set()
+
+
+async def analizar_imagen(imagen_input) -> str:
     """
     Analiza una imagen usando el detector forense v3.0+.
     
     Pipeline:
     1. Validar entrada
-    2. Llamar a detector.analyze_dict()
+    2. Encolar en el micro-batcher (detector.analyze_batch())
     3. Generar reporte HTML forense
     
     NO contiene lógica de decisión - todo viene del detector.
@@ -201,65 +384,103 @@ def analizar_imagen(imagen_input) -> str:
     if not es_valida:
         return generar_reporte_error(mensaje, "error")
     
+    # Buffer contiguo: hash y detector lo leen sin copias intermedias
+    imagen_input = np.ascontiguousarray(imagen_input)
+    
     try:
-        with Timer() as timer:
-            # Análisis con el detector v3.0+ (toda la lógica está aquí)
-            resultado = image_detector.analyze_dict(imagen_input)
+        cache_key = hash_array(imagen_input) if imagen_input.nbytes <= _CACHE_MAX_BYTES else None
         
-        # Obtener dimensiones
-        if hasattr(imagen_input, 'shape'):
-            alto, ancho = imagen_input.shape[:2]
+        t0 = time.perf_counter()
+        resultado = _IMG_CACHE.get(cache_key) if cache_key else None
+        if resultado is None:
+            # Análisis con el detector v3.0+ (toda la lógica está aquí)
+            resultado = await _image_batcher.submit(imagen_input)
+            if cache_key and resultado.get("verdict") != "ERROR":
+                _IMG_CACHE.put(cache_key, resultado)
         else:
-            ancho, alto = imagen_input.size
+            logger.info("♻️ Resultado de imagen recuperado de caché")
+        tiempo = time.perf_counter() - t0
+        
+        # Obtener dimensiones (validar_imagen garantiza HWC)
+        alto, ancho = imagen_input.shape[:2]
         
         # Generar reporte forense explicable
         return generar_reporte_imagen_forense(
             resultado=resultado,
             ancho=ancho,
             alto=alto,
-            tiempo=timer.duracion,
+            tiempo=tiempo,
         )
         
     except Exception as e:
-        logger.error(f"❌ Error en análisis de imagen: {e}", exc_info=True)
+        logger.error("❌ Error en análisis de imagen: %s", e, exc_info=True)
         return generar_reporte_error(f"Error durante el análisis: {str(e)}", "error")
 
 
-def analizar_video(video_path: str, progress=gr.Progress()) -> Tuple[str, str, Optional[Image.Image], Optional[Image.Image]]:
+async def analizar_video(video_path: str, progress=gr.Progress()) -> Tuple[str, str, Optional[Image.Image], Optional[Image.Image]]:
     """
     Analiza un video para detectar deepfakes.
     """
     logger.info("🎬 Solicitud de análisis de video recibida")
     
-    log_text = "🚀 Iniciando proceso..."
+    log_lines = ["🚀 Iniciando proceso..."]
     
     if video_path is None:
         yield generar_reporte_error("No se proporcionó ningún video", "warning"), "❌ Error: Sin video", None, None
         return
     
-    es_valido, mensaje = validar_video(video_path)
+    es_valido, mensaje = await asyncio.to_thread(validar_video, video_path)
     if not es_valido:
         yield generar_reporte_error(mensaje, "error"), f"❌ Error: {mensaje}", None, None
         return
     
     try:
+        cache_key = await asyncio.to_thread(hash_file, video_path)
+        cached = _VIDEO_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("♻️ Resultado de video recuperado de caché")
+            yield cached
+            return
+        
         with Timer() as timer:
             resultado_final = None
-            for resultado in video_detector.predict(video_path, progress):
-                if resultado["status"] == "error":
-                    yield generar_reporte_error(resultado["message"], "error"), resultado["message"], None, None
-                    return
-                elif resultado["status"] == "complete":
-                    resultado_final = resultado
-                else:
-                    log_text += f"\n{resultado['message']}"
-                    yield "", log_text, None, None
+            early_exit_pedido = False
+            ultima_actualizacion = time.monotonic()
+            # Token propio: la salida temprana solo detiene este análisis
+            cancelar = threading.Event()
+            stream = _iterar_en_hilo(video_detector.predict_stream(video_path, progress, cancelar), cancelar)
+            async with contextlib.aclosing(stream):
+                async for resultado in stream:
+                    if resultado["status"] == "error":
+                        yield generar_reporte_error(resultado["message"], "error"), resultado["message"], None, None
+                        return
+                    elif resultado["status"] == "complete":
+                        resultado_final = resultado
+                    else:
+                        log_lines.append(resultado["message"])
+                        # El progreso fino lo muestra gr.Progress; el log se
+                        # re-envía como máximo cada VIDEO_UI_UPDATE_S segundos
+                        ahora = time.monotonic()
+                        if ahora - ultima_actualizacion >= config.VIDEO_UI_UPDATE_S:
+                            ultima_actualizacion = ahora
+                            yield "", "\n".join(log_lines), None, None
+                    
+                        # Salida temprana: la media ya está saturada en un extremo
+                        running = np.asarray(resultado.get("running_scores", []))
+                        if not early_exit_pedido and len(running) >= config.EARLY_EXIT_MIN_FRAMES:
+                            media = running.mean()
+                            if media > config.EARLY_EXIT_HIGH or media < config.EARLY_EXIT_LOW:
+                                early_exit_pedido = True
+                                log_lines.append(f"⏩ Confianza saturada ({media:.1f}%), finalizando antes")
+                                cancelar.set()
         
         if resultado_final is None:
             yield generar_reporte_error("No se obtuvo resultado", "error"), "❌ Error inesperado", None, None
             return
         
-        timeline_plot = generar_grafico_temporal(resultado_final.get("predictions", []))
+        timeline_plot = await asyncio.wrap_future(
+            _get_plot_pool().submit(generar_grafico_temporal, resultado_final.get("predictions", []))
+        )
         
         reporte_html = generar_reporte_video(
             es_deepfake=resultado_final["is_deepfake"],
@@ -270,16 +491,20 @@ def analizar_video(video_path: str, progress=gr.Progress()) -> Tuple[str, str, O
             tiempo_proceso=timer.duracion,
         )
         
-        final_log = log_text + f"\n🏁 Completado: {'DEEPFAKE' if resultado_final['is_deepfake'] else 'REAL'} ({resultado_final['probability']:.1f}%)"
+        log_lines.append(f"🏁 Completado: {'DEEPFAKE' if resultado_final['is_deepfake'] else 'REAL'} ({resultado_final['probability']:.1f}%)")
         
-        yield reporte_html, final_log, timeline_plot, resultado_final.get("culprit_frame")
+        salida = (reporte_html, "\n".join(log_lines), timeline_plot, resultado_final.get("culprit_frame"))
+        _VIDEO_CACHE.put(cache_key, salida)
+        yield salida
         
     except Exception as e:
-        logger.error(f"❌ Error en video: {e}", exc_info=True)
+        logger.error("❌ Error en video: %s", e, exc_info=True)
         yield generar_reporte_error(str(e), "error"), f"❌ Error crítico: {str(e)}", None, None
+    finally:
+        _liberar_memoria_gpu()
 
 
-def analizar_audio(audio_path: str) -> str:
+async def analizar_audio(audio_path: str) -> str:
     """
     Analiza un archivo de audio para detectar si es sintético.
     """
@@ -288,17 +513,25 @@ def analizar_audio(audio_path: str) -> str:
     if audio_path is None:
         return generar_reporte_error("No se proporcionó ningún archivo de audio", "warning")
     
-    es_valido, mensaje = validar_audio(audio_path)
+    es_valido, mensaje = await asyncio.to_thread(validar_audio, audio_path)
     if not es_valido:
         return generar_reporte_error(mensaje, "error")
     
     try:
+        cache_key = await asyncio.to_thread(hash_file, audio_path)
+        
         with Timer() as timer:
-            resultado = audio_detector.predict(audio_path)
+            resultado = _AUDIO_CACHE.get(cache_key)
+            if resultado is None:
+                resultado = await asyncio.to_thread(audio_detector.predict, audio_path)
+            else:
+                logger.info("♻️ Resultado de audio recuperado de caché")
         
         if "error" in resultado and resultado.get("verdict") == "ERROR":
             return generar_reporte_error(resultado["error"], "error")
         
+        _AUDIO_CACHE.put(cache_key, resultado)
+        
         return generar_reporte_audio(
             es_sintetico=resultado["score"] > 50,
             probabilidad=resultado["score"],
@@ -307,7 +540,7 @@ def analizar_audio(audio_path: str) -> str:
         )
         
     except Exception as e:
-        logger.error(f"❌ Error en análisis de audio: {e}", exc_info=True)
+        logger.error("❌ Error en análisis de audio: %s", e, exc_info=True)
         return generar_reporte_error(f"Error durante el análisis: {str(e)}", "error")
 
 
@@ -322,6 +555,31 @@ css_custom = """
 .tab-nav button {
     font-size: 1.1em !important;
 }
+
+/* Reporte forense de imagen */
+.uide-report { font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif; max-width: 600px; }
+.uide-verdict-hdr {
+    display: flex; align-items: center; gap: 12px;
+    background: var(--v-bg); border: 2px solid var(--v-border);
+    border-radius: 12px; padding: 20px; margin-bottom: 16px;
+}
+.uide-verdict-hdr .uide-emoji { font-size: 2.5em; }
+.uide-verdict-hdr h2 { margin: 0; color: var(--v-color); font-size: 1.4em; }
+.uide-verdict-hdr p { margin: 4px 0 0 0; color: #6b7280; }
+.uide-card { background: #f9fafb; border-radius: 12px; padding: 16px; margin-bottom: 16px; }
+.uide-card h3 { margin: 0 0 12px 0; color: #1f2937; font-size: 1.1em; }
+.uide-score-row { margin: 8px 0; }
+.uide-score-label { display: flex; justify-content: space-between; margin-bottom: 4px; }
+.uide-score-label span:first-child { font-weight: 500; }
+.uide-score-label span:last-child { font-weight: 600; color: var(--bar-color); }
+.uide-bar { background: #e5e7eb; border-radius: 4px; height: 8px; overflow: hidden; }
+.uide-bar-fill { background: var(--bar-color); height: 100%; width: var(--bar-width); transition: width 0.3s; }
+.uide-evidence { margin: 0; padding-left: 20px; font-size: 0.95em; }
+.uide-evidence li { margin: 4px 0; color: #374151; }
+.uide-notes { background: #eff6ff; }
+.uide-notes h3 { margin: 0 0 8px 0; color: #1e40af; font-size: 1em; }
+.uide-notes p { margin: 0; color: #1e3a8a; font-size: 0.95em; }
+.uide-meta { display: flex; gap: 16px; flex-wrap: wrap; font-size: 0.85em; color: #6b7280; }
 """
 
 with gr.Blocks(title="UIDE Forense AI 3.0+") as demo:
@@ -369,7 +627,14 @@ with gr.Blocks(title="UIDE Forense AI 3.0+") as demo:
                 with gr.Column():
                     img_output = gr.HTML(label="Resultados Forenses")
 
-            btn_img.click(analizar_imagen, inputs=img_input, outputs=img_output)
+            # Límite = tamaño de lote para que el micro-batcher pueda agrupar.
+            # No se usa batch=True de Gradio: el micro-batcher agrupa después de
+            # la caché por hash, así cada solicitud conserva su acierto de caché
+            # y su propio tiempo de respuesta.
+            btn_img.click(
+                analizar_imagen, inputs=img_input, outputs=img_output,
+                concurrency_id="gpu_light", concurrency_limit=config.IMAGE_BATCH_MAX,
+            )
 
         # =============================================
         # TAB 2: Video (Deepfakes)
@@ -409,7 +674,9 @@ with gr.Blocks(title="UIDE Forense AI 3.0+") as demo:
             btn_vid.click(
                 fn=analizar_video,
                 inputs=vid_input,
-                outputs=[vid_report_output, log_output, timeline_output, culprit_output]
+                outputs=[vid_report_output, log_output, timeline_output, culprit_output],
+                concurrency_id="gpu_heavy",
+                concurrency_limit=config.VIDEO_CONCURRENCY,
             )
 
         # =============================================
@@ -434,7 +701,10 @@ with gr.Blocks(title="UIDE Forense AI 3.0+") as demo:
                 with gr.Column():
                     audio_output = gr.HTML(label="Resultados")
 
-            btn_audio.click(analizar_audio, inputs=audio_input, outputs=audio_output)
+            btn_audio.click(
+                analizar_audio, inputs=audio_input, outputs=audio_output,
+                concurrency_id="cpu", concurrency_limit=config.AUDIO_CONCURRENCY,
+            )
 
         # =============================================
         # TAB 4: Acerca de
@@ -474,7 +744,10 @@ with gr.Blocks(title="UIDE Forense AI 3.0+") as demo:
 
 if __name__ == "__main__":
     logger.info("🌐 Iniciando servidor Gradio...")
-    demo.queue().launch(
+    demo.queue(
+        default_concurrency_limit=config.GRADIO_CONCURRENCY,
+        max_size=config.GRADIO_MAX_QUEUE,
+    ).launch(
         server_name="0.0.0.0",
         server_port=7860,
         show_error=True
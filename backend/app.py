@@ -7,10 +7,17 @@ Migración de Grad io a Flask + React con DeepSeek-R1 integrado.
 
 import os
 import logging
+import threading
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson es opcional; se usa el json de la stdlib
+    orjson = None
+
 import sys
 from pathlib import Path
 
@@ -26,21 +33,72 @@ import config
 from routes import analyze, semantic, fusion, health, upload
 
 
-def create_app(config_name='default'):
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask basado en orjson (serialización en C).
+    
+    Mantiene el formato del proveedor por defecto (claves ordenadas,
+    fechas HTTP) y admite arrays numpy en las respuestas de análisis.
+    """
+    
+    _OPTIONS = (
+        orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    ) if orjson is not None else 0
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Opciones propias de json.dumps (indent, etc.)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """
+        jsonify() con los bytes de orjson directamente.
+        
+        El response() base siempre pasa separators/indent a dumps(), lo que
+        desviaba toda respuesta al json de la stdlib. En modo compacto se
+        serializa con orjson sin decodificar a str; con indentación
+        (debug) se conserva el comportamiento por defecto.
+        """
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(
+            obj, default=self.default, option=self._OPTIONS | orjson.OPT_APPEND_NEWLINE
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def create_app(config_name='default', warmup=None):
     """
     Application Factory para Flask.
     
     Args:
         config_name: Nombre de la configuración a usar
+        warmup: Precalentar los detectores en segundo plano
+                (por defecto config.WARMUP_ON_START)
         
     Returns:
         Flask app configurada
     """
+    # Hilos y cuDNN (una vez por proceso, antes de cargar modelos)
+    from core.model_manager import configurar_runtime
+    configurar_runtime()
+    
     app = Flask(__name__)
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
     
     # Configuración
     app.config.from_object(config)
-    app.config['MAX_CONTENT_LENGTH'] = 20 * 1024 * 1024  # 20MB max upload
+    # Límite global: Werkzeug responde 413 sin leer el cuerpo
+    app.config['MAX_CONTENT_LENGTH'] = max(config.MAX_VIDEO_SIZE_MB, config.MAX_AUDIO_SIZE_MB) * 1024 * 1024
     app.config['UPLOAD_FOLDER'] = config.UPLOAD_FOLDER
     
     # CORS (permitir requests desde React frontend)
@@ -62,6 +120,7 @@ def create_app(config_name='default'):
     from backend import database
     try:
         database.init_db()
+        database.start_maintenance()
         app.logger.info("✅ Database initialized")
     except Exception as e:
         app.logger.error(f"❌ Database initialization failed: {e}")
@@ -72,6 +131,10 @@ def create_app(config_name='default'):
     # Error handlers
     register_error_handlers(app)
     
+    # Precalentamiento de modelos (no bloquea el arranque)
+    if config.WARMUP_ON_START if warmup is None else warmup:
+        start_warmup()
+    
     # Request logging
     @app.before_request
     def log_request():
@@ -150,6 +213,39 @@ def register_blueprints(app):
     app.register_blueprint(history_bp, url_prefix='/api')
 
 
+logger = logging.getLogger(__name__)
+
+_warmup_started = False
+_warmup_lock = threading.Lock()
+
+
+def _warmup_detectors():
+    """Carga los detectores de cada blueprint; un fallo no detiene a los demás."""
+    from routes import analyze_audio, analyze_video
+    
+    for module in (analyze, analyze_video, analyze_audio):
+        try:
+            module.warmup()
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up de {module.__name__} falló: {e}")
+    logger.info("🔥 Detectores precalentados")
+
+
+def start_warmup():
+    """
+    Inicia (una vez por proceso) el precalentamiento en un hilo daemon.
+    
+    Con gunicorn --preload se registra para después del fork (ver wsgi.py):
+    los hilos y el contexto CUDA no sobreviven al fork.
+    """
+    global _warmup_started
+    with _warmup_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+    threading.Thread(target=_warmup_detectors, name="uide-warmup", daemon=True).start()
+
+
 def register_error_handlers(app):
     """Registrar manejadores de errores."""
     
@@ -168,7 +264,8 @@ def register_error_handlers(app):
     
     @app.errorhandler(413)
     def file_too_large(error):
-        return {"error": "File too large. Maximum size is 20MB"}, 413
+        max_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+        return {"error": f"File too large. Maximum size is {max_mb}MB"}, 413
 
 
 if __name__ == '__main__':
@@ -176,9 +273,10 @@ if __name__ == '__main__':
     
     app = create_app()
     
-    # Modo desarrollo
+    # Modo desarrollo: FLASK_DEBUG=true activa debug y el reloader, que
+    # re-importa la app (y carga los modelos) en un segundo proceso
     app.run(
         host='0.0.0.0',
         port=5000,
-        debug=True
+        debug=config.DEBUG
     )
@@ -11,17 +11,116 @@ Schema Design:
 import os
 import sqlite3
 import json
+import time
+import queue
+import atexit
 import logging
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; compact stdlib json is used instead
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 # Database path (relative to backend directory)
 DB_DIR = Path(__file__).parent / "data"
 DB_PATH = DB_DIR / "forensics.db"
 
+# Per-connection tuning. journal_mode=WAL is persistent (stored in the file);
+# the rest must be applied on every new connection.
+#   - WAL + synchronous=NORMAL: one fsync per checkpoint instead of two per
+#     commit, and readers (history/stats) no longer block on inserts
+#   - temp_store/cache_size/mmap_size: keep sorts and hot pages in memory
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+    "PRAGMA cache_size=-20000",    # ~20 MB
+)
+
+
+# ts_epoch (ms since the Unix epoch) is what gets sorted and indexed; the
+# ISO timestamp text is derived from it by SQLite for display
+_INSERT_SQL = """
+    INSERT INTO analysis_history
+    (filename, media_type, ts_epoch, timestamp, verdict, ai_probability, meta_1, meta_2, notes, full_report_json)
+    VALUES (?1, ?2, ?3, strftime('%Y-%m-%dT%H:%M:%f', ?3 / 1000.0, 'unixepoch'), ?4, ?5, ?6, ?7, ?8, ?9)
+"""
+
+# One connection per thread (Flask worker threads), opened lazily and reused
+_conn_local = threading.local()
+
+
+def _get_conn() -> sqlite3.Connection:
+    """
+    Return this thread's connection to DB_PATH, opening it on first use.
+    
+    The connection runs in autocommit mode (isolation_level=None); use
+    unit_of_work() around multi-statement writes. It is reopened if DB_PATH
+    changes (tests point the module at a temporary file).
+    """
+    conn = getattr(_conn_local, "conn", None)
+    if conn is not None and _conn_local.path == DB_PATH:
+        return conn
+    
+    if conn is not None:
+        conn.close()
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    _conn_local.conn, _conn_local.path = conn, DB_PATH
+    return conn
+
+
+@contextmanager
+def unit_of_work() -> Iterator[sqlite3.Connection]:
+    """
+    Run a block of writes as one transaction on this thread's connection.
+    
+    Everything written inside (insert_analysis, insert_analyses_bulk, raw
+    statements on the yielded connection) commits together with a single
+    fsync, or is rolled back if the block raises. BEGIN IMMEDIATE takes the
+    write lock up front so the commit cannot fail with SQLITE_BUSY halfway.
+    
+    Needed because the connection is in autocommit mode: `with conn:` alone
+    would not open a transaction. A nested call runs as a SAVEPOINT, so its
+    failure only undoes its own writes.
+    """
+    conn = _get_conn()
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT unit_of_work")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO unit_of_work")
+            conn.execute("RELEASE unit_of_work")
+            raise
+        conn.execute("RELEASE unit_of_work")
+        return
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def close_connection():
+    """Close this thread's connection (if any)."""
+    conn = getattr(_conn_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _conn_local.conn = None
+
 
 def init_db():
     """
@@ -31,7 +130,8 @@ def init_db():
         - id: Primary key
         - filename: Original file name
         - media_type: 'IMAGE', 'VIDEO', or 'AUDIO'
-        - timestamp: ISO format timestamp
+        - timestamp: ISO format timestamp (UTC)
+        - ts_epoch: Same instant in ms since the Unix epoch (sort key)
         - verdict: Text verdict from analysis
         - ai_probability: Float (0-100) AI confidence
         - meta_1: Polymorphic field (type-dependent)
@@ -43,9 +143,12 @@ def init_db():
     DB_DIR.mkdir(parents=True, exist_ok=True)
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _get_conn()
         cursor = conn.cursor()
         
+        # Only takes effect on a new database (before the first table exists)
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS analysis_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,23 +160,30 @@ def init_db():
                 meta_1 REAL,
                 meta_2 REAL,
                 notes TEXT,
-                full_report_json TEXT NOT NULL
+                full_report_json TEXT NOT NULL,
+                ts_epoch INTEGER
             )
         """)
         
+        _migrate_ts_epoch()
+        
         # Create index for faster queries
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_timestamp 
-            ON analysis_history(timestamp DESC)
+            CREATE INDEX IF NOT EXISTS idx_epoch
+            ON analysis_history(ts_epoch DESC)
         """)
         
+        # Serves filtered history (WHERE media_type = ? ORDER BY ts_epoch DESC)
+        # straight from the index; its media_type prefix replaces idx_media_type
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_media_type 
-            ON analysis_history(media_type)
+            CREATE INDEX IF NOT EXISTS idx_type_epoch
+            ON analysis_history(media_type, ts_epoch DESC)
         """)
+        # Superseded by the integer-keyed indexes above
+        for index in ("idx_media_type", "idx_timestamp", "idx_type_ts"):
+            cursor.execute(f"DROP INDEX IF EXISTS {index}")
         
-        conn.commit()
-        conn.close()
+        _init_stats_counters()
         
         logger.info(f"✅ Database initialized: {DB_PATH}")
         
@@ -82,6 +192,144 @@ def init_db():
         raise
 
 
+def _migrate_ts_epoch():
+    """
+    Add and backfill ts_epoch on databases created before it existed.
+    
+    Existing rows get their epoch from the stored ISO timestamp (UTC).
+    """
+    with unit_of_work() as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(analysis_history)")}
+        if "ts_epoch" in columns:
+            return
+        
+        conn.execute("ALTER TABLE analysis_history ADD COLUMN ts_epoch INTEGER")
+        conn.execute("""
+            UPDATE analysis_history
+            SET ts_epoch = CAST(ROUND((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER)
+        """)
+        logger.info("🔄 Migrated analysis_history timestamps to ts_epoch")
+
+
+def _init_stats_counters():
+    """
+    Create the stats_counters table and the triggers that maintain it.
+    
+    get_stats() reads these per-type counters instead of aggregating the
+    whole history. On first creation the counters are backfilled from the
+    existing rows, in the same transaction as the triggers.
+    """
+    with unit_of_work() as conn:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_counters'"
+        ).fetchone()
+        if exists:
+            return
+        
+        conn.execute("""
+            CREATE TABLE stats_counters (
+                media_type TEXT PRIMARY KEY,
+                cnt INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            INSERT INTO stats_counters (media_type, cnt)
+            SELECT media_type, COUNT(*) FROM analysis_history GROUP BY media_type
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_stats_insert
+            AFTER INSERT ON analysis_history
+            BEGIN
+                INSERT INTO stats_counters (media_type, cnt) VALUES (NEW.media_type, 1)
+                ON CONFLICT(media_type) DO UPDATE SET cnt = cnt + 1;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_stats_delete
+            AFTER DELETE ON analysis_history
+            BEGIN
+                UPDATE stats_counters SET cnt = cnt - 1 WHERE media_type = OLD.media_type;
+            END
+        """)
+
+
+def _dumps_report(result: Dict[str, Any]) -> str:
+    """
+    Serialize a result for full_report_json as compact UTF-8 JSON.
+    
+    Uses orjson when available (also handles numpy values); falls back to
+    the stdlib for anything orjson rejects.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                result, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except TypeError:
+            pass
+    return json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+
+
+def _build_row(filename: str, media_type: str, result: Dict[str, Any]) -> tuple:
+    """
+    Map a detector result to an analysis_history row (in _INSERT_SQL order).
+    
+    Mapping Logic:
+        IMAGE:  meta_1 = MultiLID score, meta_2 = UFD score
+        VIDEO:  meta_1 = duration (seconds), meta_2 = frames_analyzed
+        AUDIO:  meta_1 = duration (seconds), meta_2 = confidence score
+    """
+    # Extract common fields
+    verdict = result.get('verdict', 'UNKNOWN')
+    notes = result.get('notes', '')
+    
+    # Type-specific field mapping
+    ai_probability = None
+    meta_1 = None
+    meta_2 = None
+    
+    if media_type == 'IMAGE':
+        # For images: extract from ForensicResult
+        scores = result.get('scores', {})
+        ai_probability = scores.get('ai_probability', scores.get('unified', 0.0)) * 100
+        meta_1 = scores.get('MultiLID', 0.0)  # MultiLID score
+        meta_2 = scores.get('UFD', 0.0)  # UFD score
+        
+        # If notes is empty, use evidence
+        if not notes and 'evidence' in result:
+            notes = ' | '.join(result['evidence'])
+    
+    elif media_type == 'VIDEO':
+        # For videos: probability, duration, frames
+        ai_probability = result.get('probability', 0.0)
+        meta_1 = result.get('duration', 0.0)  # Duration in seconds
+        meta_2 = float(result.get('frames_analyzed', 0))  # Frames analyzed
+        
+    elif media_type == 'AUDIO':
+        # For audio: score, duration, confidence
+        ai_probability = result.get('score', 0.0)
+        meta_1 = result.get('duration_analyzed', 0.0)  # Duration in seconds
+        meta_2 = result.get('confidence', 0.0)  # Confidence score
+    
+    # Timestamp (ms since the Unix epoch)
+    ts_epoch = int(time.time() * 1000)
+    
+    # Serialize full report
+    full_report_json = _dumps_report(result)
+    
+    return (
+        filename,
+        media_type,
+        ts_epoch,
+        verdict,
+        ai_probability,
+        meta_1,
+        meta_2,
+        notes,
+        full_report_json
+    )
+
+
 def insert_analysis(filename: str, media_type: str, result: Dict[str, Any]) -> Optional[int]:
     """
     Insert analysis result into database with polymorphic field mapping.
@@ -100,133 +348,245 @@ def insert_analysis(filename: str, media_type: str, result: Dict[str, Any]) -> O
         Inserted row ID or None if error
     """
     try:
-        # Extract common fields
-        verdict = result.get('verdict', 'UNKNOWN')
-        notes = result.get('notes', '')
+        row = _build_row(filename, media_type, result)
         
-        # Type-specific field mapping
-        ai_probability = None
-        meta_1 = None
-        meta_2 = None
+        # A single INSERT is atomic in autocommit mode; inside
+        # unit_of_work() it becomes part of that transaction
+        row_id = _get_conn().execute(_INSERT_SQL, row).lastrowid
         
-        if media_type == 'IMAGE':
-            # For images: extract from ForensicResult
-            scores = result.get('scores', {})
-            ai_probability = scores.get('ai_probability', scores.get('unified', 0.0)) * 100
-            meta_1 = scores.get('MultiLID', 0.0)  # MultiLID score
-            meta_2 = scores.get('UFD', 0.0)  # UFD score
-            
-            # If notes is empty, use evidence
-            if not notes and 'evidence' in result:
-                notes = ' | '.join(result['evidence'])
-        
-        elif media_type == 'VIDEO':
-            # For videos: probability, duration, frames
-            ai_probability = result.get('probability', 0.0)
-            meta_1 = result.get('duration', 0.0)  # Duration in seconds
-            meta_2 = float(result.get('frames_analyzed', 0))  # Frames analyzed
-            
-        elif media_type == 'AUDIO':
-            # For audio: score, duration, confidence
-            ai_probability = result.get('score', 0.0)
-            meta_1 = result.get('duration_analyzed', 0.0)  # Duration in seconds
-            meta_2 = result.get('confidence', 0.0)  # Confidence score
-        
-        # Generate timestamp
-        timestamp = datetime.utcnow().isoformat()
+        logger.info(f"✅ Analysis saved to DB: {filename} ({media_type}) - ID: {row_id}")
+        return row_id
         
-        # Serialize full report
-        full_report_json = json.dumps(result, ensure_ascii=False)
+    except Exception as e:
+        logger.error(f"❌ Error inserting analysis: {e}", exc_info=True)
+        return None
+
+
+def insert_analyses_bulk(records: Iterable[Tuple[str, str, Dict[str, Any]]]) -> int:
+    """
+    Insert many analysis results in a single transaction.
+    
+    Args:
+        records: Iterable of (filename, media_type, result) tuples
         
-        # Insert into database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+    Returns:
+        Number of inserted rows (0 if the transaction was rolled back)
+    """
+    try:
+        rows = [_build_row(*record) for record in records]
+        if not rows:
+            return 0
         
-        cursor.execute("""
-            INSERT INTO analysis_history 
-            (filename, media_type, timestamp, verdict, ai_probability, meta_1, meta_2, notes, full_report_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            filename,
-            media_type,
-            timestamp,
-            verdict,
-            ai_probability,
-            meta_1,
-            meta_2,
-            notes,
-            full_report_json
-        ))
+        with unit_of_work() as conn:
+            conn.executemany(_INSERT_SQL, rows)
         
-        row_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        logger.info(f"✅ {len(rows)} analyses saved to DB")
+        return len(rows)
         
-        logger.info(f"✅ Analysis saved to DB: {filename} ({media_type}) - ID: {row_id}")
-        return row_id
+    except Exception as e:
+        logger.error(f"❌ Error inserting analyses: {e}", exc_info=True)
+        return 0
+
+
+# Background writer: analyze routes enqueue rows and return immediately; one
+# thread commits them in batches (one fsync per batch instead of per request)
+_WRITER_BATCH_SIZE = 64
+_WRITER_MAX_WAIT_S = 0.1
+
+_write_queue: "queue.Queue[tuple]" = queue.Queue()
+_writer_lock = threading.Lock()
+_writer_pid: Optional[int] = None
+
+
+def _writer():
+    """Drain the write queue forever, committing up to 64 rows or 100 ms at a time."""
+    while True:
+        batch = [_write_queue.get()]
+        deadline = time.monotonic() + _WRITER_MAX_WAIT_S
+        while len(batch) < _WRITER_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_write_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
         
+        try:
+            with unit_of_work() as conn:
+                conn.executemany(_INSERT_SQL, batch)
+            logger.info(f"✅ {len(batch)} queued analyses saved to DB")
+        except Exception as e:
+            logger.error(f"❌ Error writing queued analyses: {e}", exc_info=True)
+        finally:
+            for _ in batch:
+                _write_queue.task_done()
+
+
+def _ensure_writer():
+    """Start the writer thread once per process (threads do not survive fork)."""
+    global _write_queue, _writer_pid
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid == os.getpid():
+            return
+        if _writer_pid is not None:
+            # Forked child: the inherited queue may hold the parent's items/locks
+            _write_queue = queue.Queue()
+        else:
+            atexit.register(flush_writes)
+        threading.Thread(target=_writer, name="db-writer", daemon=True).start()
+        _writer_pid = os.getpid()
+
+
+def enqueue_analysis(filename: str, media_type: str, result: Dict[str, Any]) -> bool:
+    """
+    Queue an analysis result for insertion by the background writer.
+    
+    The row (including its timestamp) is built now; the INSERT happens
+    asynchronously, so the row id is not available to the caller.
+    
+    Returns:
+        True if the result was queued, False if it could not be serialized
+    """
+    try:
+        row = _build_row(filename, media_type, result)
     except Exception as e:
-        logger.error(f"❌ Error inserting analysis: {e}", exc_info=True)
-        return None
+        logger.error(f"❌ Error queuing analysis: {e}", exc_info=True)
+        return False
+    
+    _ensure_writer()
+    _write_queue.put(row)
+    return True
 
 
-def get_history(limit: int = 50) -> List[Dict[str, Any]]:
+def flush_writes():
+    """Block until every queued analysis has been written."""
+    if _writer_pid == os.getpid():
+        _write_queue.join()
+
+
+# Periodic maintenance: WAL growth slows every read, so truncate it regularly
+_MAINTENANCE_INTERVAL_S = 300
+_maintenance_pid: Optional[int] = None
+
+
+def _maintenance_loop(interval: float):
+    """Checkpoint and truncate the WAL every `interval` seconds."""
+    while True:
+        time.sleep(interval)
+        try:
+            busy, log_pages, _ = _get_conn().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            if busy:
+                logger.debug(f"WAL checkpoint incomplete ({log_pages} pages, readers active)")
+        except Exception as e:
+            logger.warning(f"⚠️ WAL checkpoint failed: {e}")
+
+
+def _optimize():
+    """Let SQLite refresh query-planner statistics (cheap; run at shutdown)."""
+    try:
+        _get_conn().execute("PRAGMA optimize")
+    except Exception as e:
+        logger.warning(f"⚠️ PRAGMA optimize failed: {e}")
+
+
+def start_maintenance(interval: float = _MAINTENANCE_INTERVAL_S):
+    """
+    Start the background WAL checkpoint thread once per process.
+    
+    Also registers PRAGMA optimize to run at interpreter exit. Call again
+    in forked workers (threads do not survive fork).
+    """
+    global _maintenance_pid
+    with _writer_lock:
+        if _maintenance_pid == os.getpid():
+            return
+        if _maintenance_pid is None:
+            atexit.register(_optimize)
+        threading.Thread(
+            target=_maintenance_loop, args=(interval,), name="db-maintenance", daemon=True
+        ).start()
+        _maintenance_pid = os.getpid()
+
+
+def _format_image(meta_1: float, meta_2: float) -> str:
+    return f"MultiLID: {meta_1:.3f}, UFD: {meta_2:.3f}"
+
+
+def _format_video(meta_1: float, meta_2: float) -> str:
+    return f"Duración: {meta_1:.1f}s, Frames: {int(meta_2)}"
+
+
+def _format_audio(meta_1: float, meta_2: float) -> str:
+    return f"Duración: {meta_1:.1f}s, Confianza: {meta_2:.1f}%"
+
+
+# History 'details' text per media type (inverse of the meta_1/meta_2 mapping in _build_row)
+_DETAIL_FORMATTERS = {
+    'IMAGE': _format_image,
+    'VIDEO': _format_video,
+    'AUDIO': _format_audio,
+}
+
+
+def get_history(
+    limit: int = 50,
+    include_full: bool = True,
+    media_type: Optional[str] = None,
+) -> List[Dict[str, Any]]:
     """
     Retrieve analysis history with formatted details.
     
+    The stored report is not parsed here: 'full_report' holds the raw JSON
+    text, so callers that only need the summary columns pay nothing for it.
+    
     Args:
         limit: Maximum number of records to return (default: 50)
+        include_full: Also read full_report_json (default: True)
+        media_type: Only return 'IMAGE', 'VIDEO' or 'AUDIO' records (default: all)
         
     Returns:
         List of formatted history records
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
+        conn = _get_conn()
         cursor = conn.cursor()
         
-        cursor.execute("""
+        full_column = ", full_report_json" if include_full else ""
+        where = "WHERE media_type = ?" if media_type else ""
+        params = (media_type, limit) if media_type else (limit,)
+        cursor.execute(f"""
             SELECT id, filename, media_type, timestamp, verdict, 
-                   ai_probability, meta_1, meta_2, notes, full_report_json
+                   ai_probability, meta_1, meta_2, notes{full_column}
             FROM analysis_history
-            ORDER BY timestamp DESC
+            {where}
+            ORDER BY ts_epoch DESC
             LIMIT ?
-        """, (limit,))
+        """, params)
         
         rows = cursor.fetchall()
-        conn.close()
         
         # Format results
         results = []
         for row in rows:
-            # Parse full report for additional context if needed
-            try:
-                full_report = json.loads(row['full_report_json'])
-            except:
-                full_report = {}
-            
-            # Format details based on media type
-            details = ""
             media_type = row['media_type']
+            formatter = _DETAIL_FORMATTERS.get(media_type)
             
-            if media_type == 'IMAGE':
-                details = f"MultiLID: {row['meta_1']:.3f}, UFD: {row['meta_2']:.3f}"
-            elif media_type == 'VIDEO':
-                details = f"Duración: {row['meta_1']:.1f}s, Frames: {int(row['meta_2'])}"
-            elif media_type == 'AUDIO':
-                details = f"Duración: {row['meta_1']:.1f}s, Confianza: {row['meta_2']:.1f}%"
-            
-            results.append({
+            record = {
                 'id': row['id'],
                 'filename': row['filename'],
                 'type': media_type,
                 'timestamp': row['timestamp'],
                 'verdict': row['verdict'],
                 'ai_probability': round(row['ai_probability'], 1) if row['ai_probability'] else 0.0,
-                'details': details,
+                'details': formatter(row['meta_1'] or 0.0, row['meta_2'] or 0.0) if formatter else "",
                 'notes': row['notes'] or '',
-                'full_report': full_report
-            })
+            }
+            if include_full:
+                record['full_report'] = row['full_report_json']
+            results.append(record)
         
         logger.info(f"📋 Retrieved {len(results)} history records")
         return results
@@ -240,26 +600,22 @@ def get_stats() -> Dict[str, Any]:
     """
     Get database statistics.
     
+    Reads the trigger-maintained stats_counters table (one row per media
+    type), so the cost does not grow with the history size.
+    
     Returns:
         Dictionary with count statistics by media type
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _get_conn()
         cursor = conn.cursor()
         
-        # Total count
-        cursor.execute("SELECT COUNT(*) FROM analysis_history")
-        total = cursor.fetchone()[0]
-        
         # Count by type
-        cursor.execute("""
-            SELECT media_type, COUNT(*) 
-            FROM analysis_history 
-            GROUP BY media_type
-        """)
+        cursor.execute("SELECT media_type, cnt FROM stats_counters WHERE cnt > 0")
         type_counts = dict(cursor.fetchall())
         
-        conn.close()
+        # Total count
+        total = sum(type_counts.values())
         
         return {
             'total': total,
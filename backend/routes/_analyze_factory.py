@@ -0,0 +1,139 @@
+"""
+API Routes: Fábrica de endpoints de análisis
+Flujo común de /analyze_image, /analyze_audio y /analyze_video.
+
+Validar → guardar (o leer en memoria) → analizar → historial → limpiar.
+"""
+import os
+import time
+import logging
+from typing import Callable, Iterable, Optional
+
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.utils import secure_filename
+
+from routes.upload import save_upload
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+def make_analyze_blueprint(
+    name: str,
+    media_type: str,
+    get_detector: Callable,
+    predict: Callable,
+    allowed_exts: Iterable[str],
+    max_mb: Optional[int] = None,
+    predict_bytes: Optional[Callable] = None,
+    in_memory_mb: int = 0,
+) -> Blueprint:
+    """
+    Crea el blueprint POST /analyze_<tipo> para un detector.
+
+    Args:
+        name: Nombre del blueprint ('analyze', 'analyze_audio', ...)
+        media_type: 'IMAGE', 'AUDIO' o 'VIDEO' (campo del formulario y del historial)
+        get_detector: Retorna el singleton del detector
+        predict: predict(detector, filepath) → resultado
+        allowed_exts: Extensiones permitidas con punto ('.mp4', ...)
+        max_mb: Tamaño máximo del archivo (None = solo el límite global)
+        predict_bytes: predict_bytes(detector, data, filename) para analizar
+            en memoria archivos de hasta `in_memory_mb`
+        in_memory_mb: Umbral para usar predict_bytes
+
+    Returns:
+        Blueprint listo para registrar con url_prefix='/api'
+    """
+    kind = media_type.lower()
+    label = kind.capitalize()
+    # Tupla precalculada: una sola llamada a endswith por solicitud
+    allowed_exts = tuple(sorted(ext.lower() for ext in allowed_exts))
+    bp = Blueprint(name, __name__)
+
+    def allowed_file(filename):
+        return bool(filename) and filename.lower().endswith(allowed_exts)
+
+    def too_large(size_bytes, status):
+        size_mb = size_bytes / _MB
+        return jsonify({"error": f"{label} too large ({size_mb:.1f}MB). Maximum: {max_mb}MB"}), status
+
+    def analyze():
+        start_time = time.time()
+
+        # Rechazar por Content-Length antes de leer el cuerpo (request.files lo consume)
+        if max_mb and request.content_length and request.content_length > max_mb * _MB:
+            return too_large(request.content_length, 413)
+
+        # Obtener detector (carga modelos si es la primera vez)
+        try:
+            detector = get_detector()
+        except Exception as e:
+            logger.error(f"Error inicializando detector: {e}")
+            return jsonify({"error": f"Fallo al iniciar detector: {str(e)}"}), 500
+
+        # Validación
+        if kind not in request.files:
+            return jsonify({"error": f"No {kind} file provided"}), 400
+
+        file = request.files[kind]
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
+
+        if not allowed_file(file.filename):
+            return jsonify({"error": f"File type not allowed. Supported formats: {', '.join(allowed_exts)}"}), 400
+
+        filepath = None
+        try:
+            filename = secure_filename(file.filename)
+
+            # Archivos pequeños: en memoria, sin pasar por disco
+            data = file.stream.read(in_memory_mb * _MB + 1) if predict_bytes else None
+            if data is not None and len(data) <= in_memory_mb * _MB:
+                current_app.logger.info(f"[API] Procesando {kind}: {filename} ({len(data) / _MB:.1f}MB)")
+                result = predict_bytes(detector, data, filename)
+            else:
+                data = None
+                file.stream.seek(0)
+                filepath, file_size = save_upload(file, suffix=os.path.splitext(filename)[1])
+
+                # Verificar tamaño (subidas sin Content-Length)
+                if max_mb and file_size > max_mb * _MB:
+                    return too_large(file_size, 400)
+
+                current_app.logger.info(f"[API] Procesando {kind}: {filename} ({file_size / _MB:.1f}MB)")
+                result = predict(detector, filepath)
+
+            report = result.to_dict() if hasattr(result, 'to_dict') else result
+
+            # Guardar en base de datos
+            try:
+                from backend import database
+                database.enqueue_analysis(filename, media_type, report)
+            except Exception as e:
+                logger.warning(f"Error guardando en DB: {e}")
+
+            processing_time = time.time() - start_time
+            current_app.logger.info(f"[API] {label} analizado: {report.get('verdict', 'UNKNOWN')} ({processing_time:.2f}s)")
+
+            return jsonify({
+                "status": "success",
+                "result": report,
+                "processing_time": round(processing_time, 2)
+            })
+
+        except Exception as e:
+            logger.error(f"Error procesando {kind}: {e}", exc_info=True)
+            return jsonify({"error": str(e)}), 500
+
+        finally:
+            # Limpiar archivo temporal
+            if filepath and os.path.exists(filepath):
+                try:
+                    os.remove(filepath)
+                except OSError as e:
+                    logger.warning(f"No se pudo eliminar archivo temporal: {e}")
+
+    bp.add_url_rule(f'/analyze_{kind}', endpoint=f'analyze_{kind}', view_func=analyze, methods=['POST'])
+    return bp
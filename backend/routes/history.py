@@ -3,7 +3,7 @@ API Route: History
 Retrieve forensic analysis history from database.
 """
 import logging
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 
 from backend import database
 
@@ -11,6 +11,25 @@ logger = logging.getLogger(__name__)
 bp = Blueprint('history', __name__)
 
 
+def _history_response(envelope: dict, records: list):
+    """
+    Build the history JSON body, splicing each stored report in verbatim.
+    
+    full_report_json is already JSON text, so it is never parsed and
+    re-serialized: every record is serialized without it and the raw text
+    is inserted as its "full_report" member. The API still returns the
+    report as a JSON object.
+    """
+    dumps = current_app.json.dumps
+    rows = []
+    for record in records:
+        raw = record.pop('full_report', None) or '{}'
+        rows.append(f'{dumps(record)[:-1]},"full_report":{raw}}}')
+    
+    payload = f'{dumps(envelope)[:-1]},"results":[{",".join(rows)}]}}'
+    return current_app.response_class(payload, mimetype=current_app.json.mimetype)
+
+
 @bp.route('/history', methods=['GET'])
 def get_history():
     """
@@ -18,6 +37,8 @@ def get_history():
     
     Query Parameters:
         limit: Maximum number of records to return (default: 50)
+        include_full: 0 to omit each record's full_report (default: 1)
+        type: Only return IMAGE, VIDEO or AUDIO records (default: all)
         
     Returns:
         JSON with total count and results array
@@ -30,18 +51,32 @@ def get_history():
         if limit < 1 or limit > 200:
             return jsonify({"error": "Limit must be between 1 and 200"}), 400
         
+        include_full = request.args.get('include_full', 1, type=int) != 0
+        
+        media_type = request.args.get('type', type=str)
+        if media_type:
+            media_type = media_type.upper()
+            if media_type not in ('IMAGE', 'VIDEO', 'AUDIO'):
+                return jsonify({"error": "Type must be IMAGE, VIDEO or AUDIO"}), 400
+        
         # Get history from database
-        history = database.get_history(limit=limit)
+        history = database.get_history(
+            limit=limit, include_full=include_full, media_type=media_type
+        )
         
         # Get stats
         stats = database.get_stats()
         
-        return jsonify({
+        envelope = {
             "total": stats['total'],
             "returned": len(history),
             "stats": stats['by_type'],
-            "results": history
-        })
+        }
+        if include_full:
+            return _history_response(envelope, history)
+        
+        envelope["results"] = history
+        return jsonify(envelope)
         
     except Exception as e:
         logger.error(f"Error retrieving history: {e}", exc_info=True)
@@ -1,6 +1,8 @@
+import logging
 from flask import Blueprint, request, jsonify
 from services.deepseek_client import DeepSeekClient
 
+logger = logging.getLogger(__name__)
 bp = Blueprint("semantic", __name__, url_prefix="/api/semantic")
 
 # Inicializar cliente
@@ -8,27 +10,28 @@ deepseek = DeepSeekClient()
 
 @bp.route("/deepseek", methods=["POST"])
 def deepseek_route():
-    print("DEBUG: Received request to /api/semantic/deepseek")
+    logger.debug("Received request to /api/semantic/deepseek")
     try:
         data = request.get_json()
-        print(f"DEBUG: Request payload: {data}")
+        logger.debug("Request payload: %r", data)
 
         prompt = data.get("prompt")
         if not prompt:
-            print("DEBUG: Missing prompt")
+            logger.debug("Missing prompt")
             return jsonify({"error": "Missing prompt"}), 400
 
-        print("DEBUG: Calling DeepSeek client...")
+        logger.debug("Calling DeepSeek client...")
         result = deepseek.ask(prompt)
-        print(f"DEBUG: DeepSeek result: {result}")
+        logger.debug("DeepSeek result: %r", result)
 
         if not result["success"]:
-            print(f"DEBUG: Returning error 500: {result}")
+            logger.warning("DeepSeek request failed: %s", result.get("error"))
             return jsonify(result), 500
 
         return jsonify(result)
     except Exception as e:
-        print(f"DEBUG: Exception in route: {str(e)}")
+        logger.error("Exception in deepseek route: %s", e, exc_info=True)
+        return jsonify({"error": str(e)}), 500
 
 @bp.route('/chat_analysis', methods=['POST'])
 def chat_analysis():
@@ -68,5 +71,5 @@ def chat_analysis():
         return jsonify({"response": answer})
 
     except Exception as e:
-        print(f"Error in chat_analysis: {e}")
+        logger.error("Error in chat_analysis: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
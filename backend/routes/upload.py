@@ -6,18 +6,243 @@ Endpoint para subir imágenes.
 """
 
 import os
+import stat
 import time
+import struct
+import tempfile
 from flask import Blueprint, request, jsonify, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 from PIL import Image
 
+import config
+
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import FileTarget
+except ImportError:  # streaming-form-data es opcional; se usa el parser de Werkzeug
+    StreamingFormDataParser = None
+
 bp = Blueprint('upload', __name__)
 
+# Resuelto y creado una sola vez por proceso (config.UPLOAD_FOLDER)
+UPLOAD_DIR = str(config.UPLOAD_FOLDER)
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Tamaño de bloque al copiar el stream de la subida a disco
+COPY_CHUNK_SIZE = 1024 * 1024
+# Bloque para cuerpos crudos (sin multipart) en /upload
+RAW_CHUNK_SIZE = 4 * 1024 * 1024
+# /upload solo recibe imágenes: límite propio, menor que el global (videos)
+MAX_UPLOAD_BYTES = config.MAX_IMAGE_SIZE_MB * 1024 * 1024
+
+
+# Extensiones permitidas (sin punto), precalculadas al importar
+_ALLOWED = frozenset(ext.lower() for ext in config.ALLOWED_EXTENSIONS)
+
 
 def allowed_file(filename):
     """Verifica si el archivo tiene una extensión permitida."""
-    from config import ALLOWED_EXTENSIONS
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    dot = filename.rfind('.')
+    return dot != -1 and filename[dot + 1:].lower() in _ALLOWED
+
+
+def _copy_counted(src, dst, chunk_size):
+    """copyfileobj que además retorna los bytes copiados (evita un stat posterior)."""
+    size = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            return size
+        dst.write(chunk)
+        size += len(chunk)
+
+
+def _sendfile_body(dst):
+    """
+    Copia el cuerpo crudo con os.sendfile cuando wsgi.input es un archivo regular.
+
+    Algunos servidores vuelcan cuerpos grandes a un temporal; en ese caso
+    la copia ocurre en el kernel sin pasar por buffers de Python. Con un
+    socket u otro stream se retorna None y se usa la copia por bloques.
+
+    Returns:
+        Bytes copiados, o None si no aplica
+    """
+    if not hasattr(os, 'sendfile'):
+        return None
+    src = request.environ.get('wsgi.input')
+    length = request.content_length
+    try:
+        src_fd = src.fileno()
+        offset = src.tell()
+        if not stat.S_ISREG(os.fstat(src_fd).st_mode):
+            return None
+    except (AttributeError, OSError, ValueError):
+        return None
+
+    # request.stream no se usa: el límite de Werkzeug se aplica aquí
+    if request.max_content_length is not None and length > request.max_content_length:
+        raise RequestEntityTooLarge()
+
+    dst.flush()
+    size = 0
+    while size < length:
+        sent = os.sendfile(dst.fileno(), src_fd, offset + size, length - size)
+        if sent == 0:
+            break
+        size += sent
+    return size
+
+
+def save_upload(file, suffix=''):
+    """
+    Copia el stream de la subida a un archivo temporal único en bloques de 1MB.
+
+    Evita el buffer intermedio de FileStorage.save() y las colisiones entre
+    subidas con el mismo nombre. El llamador debe eliminar el archivo.
+
+    Returns:
+        (ruta del archivo temporal, tamaño en bytes)
+    """
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, suffix=suffix, delete=False) as dst:
+        try:
+            size = _copy_counted(file.stream, dst, COPY_CHUNK_SIZE)
+        except Exception:
+            dst.close()
+            os.remove(dst.name)
+            raise
+    return dst.name, size
+
+
+def _claim_path(original):
+    """
+    Reserva el nombre final `<timestamp>_<nombre>` con O_CREAT|O_EXCL.
+
+    Dos subidas del mismo archivo en el mismo segundo no se pisan: la
+    segunda recibe `<timestamp>_<n>_<nombre>`.
+
+    Returns:
+        (descriptor abierto para escritura, nombre, ruta)
+    """
+    name = secure_filename(original)
+    timestamp = str(int(time.time()))
+    n = 0
+    while True:
+        filename = f"{timestamp}_{name}" if n == 0 else f"{timestamp}_{n}_{name}"
+        filepath = os.path.join(UPLOAD_DIR, filename)
+        try:
+            fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            n += 1
+            continue
+        return fd, filename, filepath
+
+
+# Marcadores SOF de JPEG (FFC0..FFCF salvo DHT, JPG y DAC) que llevan el tamaño
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _fast_probe(path):
+    """
+    Lee formato y dimensiones de la cabecera de un PNG o JPEG (primeros 64KB).
+
+    Returns:
+        (formato, ancho, alto) o None si el formato no se reconoce
+    """
+    with open(path, 'rb') as f:
+        head = f.read(64 * 1024)
+
+    if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', head[16:24])
+        return 'PNG', width, height
+
+    if head[:2] == b'\xff\xd8':
+        i = 2
+        while i + 9 <= len(head):
+            if head[i] != 0xFF:
+                return None
+            marker = head[i + 1]
+            if marker == 0xFF:  # relleno
+                i += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # sin longitud
+                i += 2
+                continue
+            (length,) = struct.unpack('>H', head[i + 2:i + 4])
+            if marker in _JPEG_SOF:
+                height, width = struct.unpack('>HH', head[i + 5:i + 9])
+                return 'JPEG', width, height
+            i += 2 + length
+    return None
+
+
+def _probe_image(path):
+    """Formato y dimensiones sin decodificar píxeles (cabecera propia o PIL perezoso)."""
+    info = _fast_probe(path)
+    if info is None:
+        with Image.open(path) as image:
+            info = (image.format, image.width, image.height)
+    return info
+
+
+def _receive_upload():
+    """
+    Escribe el archivo de la solicitud en un temporal sin pasar por Werkzeug.
+
+    - Cuerpo crudo (no multipart): el nombre llega en la cabecera X-Filename
+      o en ?filename= y, si es válido, request.stream se copia en bloques de
+      4MB directo a la ruta final (sin temporal ni renombrado).
+      Si wsgi.input es un archivo regular se copia con os.sendfile.
+    - multipart/form-data con streaming-form-data instalado: el campo 'file'
+      se parsea en C y se escribe directo a disco.
+    - Sin streaming-form-data: request.files (parser de Werkzeug).
+
+    Werkzeug ya corta request.stream en MAX_CONTENT_LENGTH, así que el
+    tamaño se cuenta durante la copia sin volver a consultar el disco.
+
+    Returns:
+        (nombre original, ruta, tamaño, nombre final o None si la ruta es un
+        temporal); (None, None, 0, None) si no hay archivo
+    """
+    if request.mimetype != 'multipart/form-data':
+        original = request.headers.get('X-Filename') or request.args.get('filename', '')
+        if not request.content_length:
+            return None, None, 0, None
+        if not original or not allowed_file(original):
+            return original, '', 0, None
+        fd, filename, filepath = _claim_path(original)
+        try:
+            with os.fdopen(fd, 'wb') as dst:
+                size = _sendfile_body(dst)
+                if size is None:
+                    size = _copy_counted(request.stream, dst, RAW_CHUNK_SIZE)
+        except Exception:
+            os.remove(filepath)
+            raise
+        return original, filepath, size, filename
+
+    if StreamingFormDataParser is not None:
+        fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR)
+        os.close(fd)
+        target = FileTarget(tmp_path)
+        parser = StreamingFormDataParser(headers=request.headers)
+        parser.register('file', target)
+        while True:
+            chunk = request.stream.read(65536)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+        if target.multipart_filename is None:
+            os.remove(tmp_path)
+            return None, None, 0, None
+        # FileTarget no expone cuántos bytes escribió
+        return target.multipart_filename, tmp_path, os.path.getsize(tmp_path), None
+
+    if 'file' not in request.files:
+        return None, None, 0, None
+    file = request.files['file']
+    return (file.filename, *save_upload(file), None)
 
 
 @bp.route('/upload', methods=['POST'])
@@ -25,6 +250,9 @@ def upload_file():
     """
     Sube una imagen para análisis posterior.
     
+    Acepta multipart/form-data (campo 'file') o el archivo como cuerpo
+    crudo con su nombre en la cabecera X-Filename.
+    
     Response:
         {
             "status": "success",
@@ -34,31 +262,37 @@ def upload_file():
             "format": "JPEG"
         }
     """
+    # Rechazar por Content-Length antes de leer el cuerpo
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({"error": f"File too large. Maximum size is {config.MAX_IMAGE_SIZE_MB}MB"}), 413
+    
+    tmp_path = None
     try:
-        if 'file' not in request.files:
+        original, tmp_path, size, filename = _receive_upload()
+        if tmp_path is None:
             return jsonify({"error": "No file provided"}), 400
         
-        file = request.files['file']
-        
-        if file.filename == '':
+        if original == '':
             return jsonify({"error": "No file selected"}), 400
         
-        if not allowed_file(file.filename):
+        if not allowed_file(original):
             return jsonify({"error": "Invalid file type"}), 400
         
-        # Guardar archivo
-        filename = secure_filename(file.filename)
-        timestamp = str(int(time.time()))
-        filename = f"{timestamp}_{filename}"
-        
-        from config import UPLOAD_FOLDER
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        # Subidas sin Content-Length: el tamaño se conoce tras la copia
+        if size > MAX_UPLOAD_BYTES:
+            return jsonify({"error": f"File too large. Maximum size is {config.MAX_IMAGE_SIZE_MB}MB"}), 400
         
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        # Guardar archivo (el cuerpo crudo ya se escribió en su ruta final)
+        if filename is None:
+            fd, filename, filepath = _claim_path(original)
+            os.close(fd)
+            os.replace(tmp_path, filepath)
+        else:
+            filepath = tmp_path
+        tmp_path = None
         
-        # Obtener info de imagen
-        image = Image.open(filepath)
+        # Obtener info de imagen (solo cabecera)
+        image_format, width, height = _probe_image(filepath)
         
         current_app.logger.info(f"File uploaded: {filename}")
         
@@ -66,14 +300,21 @@ def upload_file():
             "status": "success",
             "filename": filename,
             "path": filepath,
-            "size": os.path.getsize(filepath),
-            "format": image.format,
+            "size": size,
+            "format": image_format,
             "dimensions": {
-                "width": image.width,
-                "height": image.height
+                "width": width,
+                "height": height
             }
         }), 200
         
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         current_app.logger.error(f"Upload error: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
+    
+    finally:
+        # Temporal descartado (sin nombre, tipo inválido o error)
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -1,5 +1,18 @@
 # Services package
-from .deepseek_client import DeepSeekClient
-from .forensics_pipeline import ForensicsPipeline
+# Submodules are imported on first access: forensics_pipeline pulls in
+# torch/transformers, which would otherwise load whenever any service
+# (e.g. the DeepSeek client) is imported.
+import importlib
+
+_EXPORTS = {
+    'DeepSeekClient': '.deepseek_client',
+    'ForensicsPipeline': '.forensics_pipeline',
+}
 
 __all__ = ['DeepSeekClient', 'ForensicsPipeline']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,31 +1,89 @@
+import json
+import logging
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+
+try:
+    import orjson
+    _dumps, _loads = orjson.dumps, orjson.loads
+except ImportError:  # orjson is optional; stdlib json handles payload and NDJSON lines
+    _dumps = lambda obj: json.dumps(obj, separators=(",", ":")).encode()
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 class DeepSeekClient:
     def __init__(self, url="http://localhost:11434/api/generate", model="deepseek-r1:7b"):
         self.url = url
         self.model = model
+        # One keep-alive pool per client: no TCP/HTTP setup per prompt.
+        # POST is replayed only on connect errors and on 5xx while Ollama is
+        # (re)loading the model; read=0 never resends a prompt after a read
+        # timeout, which keeps the tail latency bounded by one timeout.
+        self.session = requests.Session()
+        self.session.headers["Connection"] = "keep-alive"
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=config.DEEPSEEK_MAX_RETRIES,
+                read=0,
+                backoff_factor=0.3,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset({"POST"}),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # (connect, read): an unreachable Ollama fails fast, a slow generation does not
+        self.timeout = (config.DEEPSEEK_CONNECT_TIMEOUT, config.DEEPSEEK_TIMEOUT)
 
-    def ask(self, prompt: str):
+    def stream(self, prompt: str):
+        """
+        Yield the generated text as Ollama produces it.
+
+        Ollama streams one JSON object per line; each carries the next
+        "response" delta and the last one has "done": true.
+        """
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False
+            "stream": True
         }
 
-        try:
-            print(f"DEBUG: Connecting to Ollama at {self.url} with model {self.model}")
-            response = requests.post(self.url, json=payload)
-            print(f"DEBUG: Ollama status code: {response.status_code}")
+        logger.debug("Connecting to Ollama at %s with model %s", self.url, self.model)
+        with self.session.post(
+            self.url, data=_dumps(payload), headers=_JSON_HEADERS,
+            stream=True, timeout=self.timeout
+        ) as response:
+            logger.debug("Ollama status code: %d", response.status_code)
             response.raise_for_status()
-            data = response.json()
-            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = _loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"])
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    break
+
+    def ask(self, prompt: str):
+        try:
             return {
                 "success": True,
-                "response": data.get("response", "")
+                "response": "".join(self.stream(prompt))
             }
 
         except Exception as e:
-            print(f"DEBUG: DeepSeekClient Error: {str(e)}")
+            logger.warning("DeepSeekClient error: %s", e)
             return {
                 "success": False,
                 "error": str(e)
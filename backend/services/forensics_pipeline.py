@@ -8,7 +8,14 @@ Workflow:
 3. Sentencia: Binary verdict (IA or REAL)
 """
 
+import hashlib
+import io
 import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 import torch
 from PIL import Image
@@ -24,8 +31,180 @@ from modules.image_forensics.schemas import ExpertResult, ForensicResult
 from services.deepseek_client import DeepSeekClient
 import config
 
+try:
+    import simplejpeg
+except ImportError:  # simplejpeg is optional; Pillow decodes everything
+    simplejpeg = None
+
 logger = logging.getLogger(__name__)
 
+BLIP_MODEL_NAME = "Salesforce/blip-image-captioning-base"
+# Caption used when BLIP fails; results carrying it are never cached
+FALLBACK_DESCRIPTION = "imagen sin descripción"
+
+
+def _decode_rgb(source) -> Image.Image:
+    """
+    Decode an image (path or bytes) to RGB.
+    
+    JPEGs go straight through libjpeg-turbo via simplejpeg when it is
+    installed; other formats (and JPEGs it rejects, e.g. CMYK) use Pillow.
+    The accurate IDCT is kept because the forensic experts see these pixels.
+    """
+    if simplejpeg is not None:
+        if not isinstance(source, bytes):
+            with open(source, 'rb') as f:
+                source = f.read()
+        if simplejpeg.is_jpeg(source):
+            try:
+                return Image.fromarray(simplejpeg.decode_jpeg(source, colorspace='RGB'))
+            except ValueError:
+                pass
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return Image.open(source).convert('RGB')
+
+
+def _content_key(source) -> bytes:
+    """BLAKE2b digest of the image bytes (path is read in 1 MiB blocks)."""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        h.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    return h.digest()
+
+
+def _load_blip(device: str):
+    """
+    Load BLIP for captioning.
+    
+    On CUDA the weights are quantized with bitsandbytes according to
+    config.BLIP_QUANTIZATION ('4bit' NF4, '8bit' or 'none'); without
+    bitsandbytes, or with 'none', they are cast to FP16. CPU stays FP32.
+    """
+    mode = config.BLIP_QUANTIZATION.lower()
+    if device == "cuda" and mode in ("4bit", "8bit"):
+        try:
+            from transformers import BitsAndBytesConfig
+            import bitsandbytes  # noqa: F401
+            if mode == "4bit":
+                qcfg = BitsAndBytesConfig(
+                    load_in_4bit=True,
+                    bnb_4bit_quant_type="nf4",
+                    bnb_4bit_compute_dtype=torch.float16,
+                )
+            else:
+                qcfg = BitsAndBytesConfig(load_in_8bit=True)
+            model = BlipForConditionalGeneration.from_pretrained(
+                BLIP_MODEL_NAME, quantization_config=qcfg, device_map="auto"
+            )
+            logger.info(f"[PIPELINE] BLIP loaded with {mode} quantization")
+            return model
+        except Exception as e:
+            logger.warning(f"[PIPELINE] BLIP {mode} quantization unavailable, using FP16: {e}")
+    
+    model = BlipForConditionalGeneration.from_pretrained(BLIP_MODEL_NAME).to(device)
+    return model.half() if device == "cuda" else model
+
+
+def _blip_transform(image_processor, device: str = "cpu"):
+    """
+    torchvision v2 equivalent of BlipImageProcessor, built once from its settings.
+    
+    Skips the processor's per-call kwargs validation and BatchFeature
+    construction; the captioning prompt is empty so no tokenization is needed.
+    On CUDA the image is uploaded as uint8 (4x less than float32) and the
+    resize and normalization run on the GPU.
+    """
+    from torchvision.transforms import InterpolationMode, v2
+    
+    size = image_processor.size
+    resize = v2.Resize((size["height"], size["width"]), interpolation=InterpolationMode.BICUBIC, antialias=True)
+    normalize = [
+        v2.ToDtype(torch.float32, scale=True),
+        v2.Normalize(mean=list(image_processor.image_mean), std=list(image_processor.image_std)),
+    ]
+    if device != "cuda":
+        return v2.Compose([resize, v2.PILToTensor(), *normalize])
+    
+    to_tensor = v2.PILToTensor()
+    on_device = v2.Compose([resize, *normalize])
+    
+    def transform(image: Image.Image) -> torch.Tensor:
+        return on_device(to_tensor(image).to(device, non_blocking=True))
+    
+    return transform
+
+
+class _RequestBatcher:
+    """
+    Coalesces concurrent single-item calls into one batched call.
+    
+    Thread-based counterpart of utils.batcher.MicroBatcher for the threaded
+    Flask server: a worker waits for the first item, collects more for
+    `window_ms` (or until `max_batch`), runs `batch_fn` once and resolves
+    each caller's Future with its own result.
+    """
+    
+    def __init__(self, batch_fn, max_batch: int = 8, window_ms: float = 20.0, name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self.name = name
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+    
+    def submit(self, item) -> Future:
+        """Queue one item; the Future resolves to its result."""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+    
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(pending) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            try:
+                results = self.batch_fn([item for item, _ in pending])
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            
+            if len(pending) > 1:
+                logger.info(f"[BATCH] {self.name}: {len(pending)} requests in one pass")
+            for (_, future), result in zip(pending, results):
+                future.set_result(result)
+
+
+def _blip_autocast_dtype(device: str):
+    """Autocast dtype for BLIP generate, or None to stay in FP32."""
+    if device == "cuda":
+        return torch.float16
+    try:
+        capability = torch.backends.cpu.get_cpu_capability()
+    except AttributeError:
+        return None
+    # BF16 only pays off with native support; on plain AVX2 it is slower than FP32
+    return torch.bfloat16 if capability.startswith("AVX512") else None
+
 
 class ForensicsPipeline:
     """
@@ -57,9 +236,21 @@ class ForensicsPipeline:
         
         # BLIP for image description
         logger.info("[PIPELINE] Loading BLIP Vision Model...")
-        self.blip_processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-        self.blip_model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
-        self.blip_model.to(self.device)
+        self.blip_processor = BlipProcessor.from_pretrained(BLIP_MODEL_NAME)
+        self.blip_transform = _blip_transform(self.blip_processor.image_processor, self.device)
+        self.blip_model = _load_blip(self.device)
+        self.blip_model.eval()
+        # Greedy decoding with the KV cache, set once instead of per generate() call.
+        # BLIP's text decoder does not support a static cache, so it stays dynamic.
+        gen = self.blip_model.generation_config
+        gen.max_new_tokens = 50
+        gen.num_beams = 1
+        gen.do_sample = False
+        gen.use_cache = True
+        gen.return_dict_in_generate = False
+        self._compile_blip_vision()
+        # Caption precision: FP16 weights on GPU, BF16 autocast on CPUs with AVX-512/AMX
+        self._blip_autocast = _blip_autocast_dtype(self.device)
         
         # Semantic Expert with DeepSeek
         self.deepseek_enabled = deepseek_enabled
@@ -73,8 +264,58 @@ class ForensicsPipeline:
         logger.info("[PIPELINE] Initializing Fusion Engine V10.0 (Binary Logic)...")
         self.fusion = FusionEngine()
         
+        # FFT does not depend on CLIP: it runs alongside it
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline")
+        # BLIP captions from concurrent requests share one generate() call
+        self._captioner = _RequestBatcher(
+            self._caption_batch,
+            max_batch=config.IMAGE_BATCH_MAX,
+            window_ms=config.IMAGE_BATCH_WINDOW_MS,
+            name="blip-batcher",
+        )
+        
+        # Stage 1+2 outputs by file content; DeepSeek and fusion are cheap and deterministic on them
+        self._stage_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._stage_cache_lock = threading.Lock()
+        
         logger.info("[PIPELINE] V10.0 (Data-Driven DeepSeek) ready!")
 
+    def warmup(self):
+        """Load CLIP now (it is lazy) and trace BLIP so the first analysis does not pay for it."""
+        self.feature_extractor._ensure_loaded()
+        if self._blip_vision_eager is not None:
+            try:
+                # Batch 1 and the largest micro-batch: the batch dim compiles as dynamic
+                blank = Image.new("RGB", (384, 384))
+                for n in sorted({1, max(1, config.IMAGE_BATCH_MAX)}):
+                    self._generate_captions([blank] * n)
+                logger.info("[PIPELINE] BLIP vision tower compiled")
+            except Exception as e:
+                logger.warning(f"[PIPELINE] torch.compile failed for BLIP, using eager mode: {e}")
+                self.blip_model.vision_model = self._blip_vision_eager
+            self._blip_vision_eager = None
+    
+    def _compile_blip_vision(self):
+        """
+        Wrap BLIP's ViT encoder in torch.compile (config.USE_TORCH_COMPILE).
+        
+        Only the vision tower is compiled: it sees one fixed-size input per
+        image, while the text decoder changes shape on every generated token.
+        Compilation is lazy; warmup() triggers it and restores the eager
+        module if the inductor backend is unavailable. The default mode is
+        used, not reduce-overhead: request threads call the tower concurrently
+        with varying batch sizes, and CUDA graph outputs are overwritten by
+        the next replay.
+        """
+        self._blip_vision_eager = None
+        if not (config.USE_TORCH_COMPILE and hasattr(torch, "compile")):
+            return
+        if self.device == "cuda":
+            # NHWC lets cuDNN pick tensor-core kernels for the patch embedding
+            self.blip_model.vision_model.to(memory_format=torch.channels_last)
+        self._blip_vision_eager = self.blip_model.vision_model
+        self.blip_model.vision_model = torch.compile(self._blip_vision_eager, fullgraph=False)
+
     def process(self, image_path: str) -> ForensicResult:
         """
         V10.0 Pipeline:
@@ -83,31 +324,43 @@ class ForensicsPipeline:
         3. DeepSeek reads everything → score
         4. Binary decision → verdict
         """
+        return self._run(image_path, label=image_path)
+
+    def process_bytes(self, data: bytes, filename: str) -> ForensicResult:
+        """Same as process(), for an upload already held in memory."""
+        return self._run(data, label=filename)
+
+    def _run(self, source, label: str) -> ForensicResult:
+        """Decode the image once (path or bytes) and run every stage on it."""
         logger.info(f"\n{'='*60}")
         logger.info(f"[PIPELINE V10.0] Starting analysis...")
-        logger.info(f"[PIPELINE] Image: {image_path}")
+        logger.info(f"[PIPELINE] Image: {label}")
         logger.info(f"{'='*60}\n")
         
         try:
-            # === ETAPA 1: COLLECT NUMBERS (Peritos) ===
-            logger.info("[STAGE 1: PERITOS] Collecting technical numbers...")
-            
-            # MultiLID
-            logger.info("  [PERITO 1/2] MultiLID (Geometry)...")
-            multilid_result = self.multilid.analyze(image_path)
-            logger.info(f"  -> MultiLID Score: {multilid_result.score:.4f}")
-            
-            # UFD
-            logger.info("  [PERITO 2/3] UFD (Noise)...")
-            ufd_result = self.ufd.analyze(image_path)
-            logger.info(f"  -> UFD Score: {ufd_result.score:.4f}")
+            pil_image = _decode_rgb(source)
+
+            key = _content_key(source)
+            with self._stage_cache_lock:
+                cached = self._stage_cache.get(key)
+                if cached is not None:
+                    self._stage_cache.move_to_end(key)
             
-            # FFT
-            logger.info("  [PERITO 3/3] FFT (Frequency)...")
-            from PIL import Image
-            pil_image = Image.open(image_path).convert('RGB')
-            fft_result = self.fft.analyze(pil_image)
-            logger.info(f"  -> FFT Score: {fft_result.score:.4f}")
+            if cached is not None:
+                logger.info("[CACHE] Same content analyzed before, reusing expert scores + description")
+                multilid_result, ufd_result, fft_result, image_description = cached
+            else:
+                multilid_result, ufd_result, fft_result, image_description = self._collect(pil_image)
+                # Failed experts / captions must be retried on the next request
+                no_errors = all(
+                    "error" not in (r.raw_data or {})
+                    for r in (multilid_result, ufd_result, fft_result)
+                ) and image_description != FALLBACK_DESCRIPTION
+                if no_errors:
+                    with self._stage_cache_lock:
+                        self._stage_cache[key] = (multilid_result, ufd_result, fft_result, image_description)
+                        while len(self._stage_cache) > config.RESULT_CACHE_SIZE:
+                            self._stage_cache.popitem(last=False)
             
             # Technical context for DeepSeek
             technical_context = {
@@ -116,25 +369,13 @@ class ForensicsPipeline:
                 "fft": fft_result.score
             }
             
-            # === ETAPA 2: GET IMAGE DESCRIPTION (Vision) ===
-            logger.info("\n[STAGE 2: VISION] Generating image description...")
-            try:
-                pil_image = Image.open(image_path).convert('RGB')
-                inputs = self.blip_processor(pil_image, return_tensors="pt").to(self.device)
-                outputs = self.blip_model.generate(**inputs, max_new_tokens=50)
-                image_description = self.blip_processor.decode(outputs[0], skip_special_tokens=True)
-                logger.info(f"  -> Description: {image_description}")
-            except Exception as e:
-                logger.warning(f"  -> BLIP failed: {e}")
-                image_description = "imagen sin descripción"
-            
             # === ETAPA 3: DEEPSEEK JUDGE (Doctor) ===
             logger.info("\n[STAGE 3: DOCTOR] DeepSeek reading numbers + description...")
             logger.info(f"  -> Input: MultiLID={technical_context['multilid']:.3f}, UFD={technical_context['ufd']:.3f}")
             logger.info(f"  -> Context: {image_description}")
             
             semantic_result = self.semantic.analyze(
-                image_path,
+                pil_image,
                 image_description=image_description,
                 technical_context=technical_context
             )
@@ -176,6 +417,75 @@ class ForensicsPipeline:
                 notes=f"Error: {str(e)}"
             )
     
+    def _collect(self, pil_image: Image.Image) -> tuple:
+        """Stages 1 and 2: expert scores (MultiLID, UFD, FFT) and BLIP description."""
+        # === ETAPA 1 + 2 in parallel: BLIP caption and FFT run while CLIP does ===
+        caption_future = self._captioner.submit(pil_image)
+        fft_future = self._executor.submit(self.fft.analyze, pil_image)
+        
+        # === ETAPA 1: COLLECT NUMBERS (Peritos) ===
+        logger.info("[STAGE 1: PERITOS] Collecting technical numbers...")
+        
+        # One CLIP forward feeds both MultiLID and UFD
+        try:
+            features, intermediate = self.feature_extractor.extract_all_features(pil_image)
+        except Exception as e:
+            logger.warning(f"  -> Shared CLIP pass failed, experts will retry: {e}")
+            features, intermediate = None, None
+        
+        # MultiLID
+        logger.info("  [PERITO 1/2] MultiLID (Geometry)...")
+        multilid_result = self.multilid.analyze(pil_image, intermediate_features=intermediate)
+        logger.info(f"  -> MultiLID Score: {multilid_result.score:.4f}")
+        
+        # UFD
+        logger.info("  [PERITO 2/3] UFD (Noise)...")
+        ufd_result = self.ufd.analyze(pil_image, features=features)
+        logger.info(f"  -> UFD Score: {ufd_result.score:.4f}")
+        
+        # FFT
+        logger.info("  [PERITO 3/3] FFT (Frequency)...")
+        fft_result = fft_future.result()
+        logger.info(f"  -> FFT Score: {fft_result.score:.4f}")
+        
+        # === ETAPA 2: GET IMAGE DESCRIPTION (Vision) ===
+        logger.info("\n[STAGE 2: VISION] Generating image description...")
+        try:
+            image_description = caption_future.result()
+            logger.info(f"  -> Description: {image_description}")
+        except Exception as e:
+            logger.warning(f"  -> BLIP failed: {e}")
+            image_description = FALLBACK_DESCRIPTION
+        
+        return multilid_result, ufd_result, fft_result, image_description
+    
+    def _caption_batch(self, images: list) -> list:
+        """BLIP captions for a batch of PIL images (runs on the batcher thread)."""
+        try:
+            return self._generate_captions(images)
+        except Exception as e:
+            if self._blip_vision_eager is None:
+                raise
+            # First call without warmup(): the compiled tower failed, fall back to eager
+            logger.warning(f"  -> torch.compile failed for BLIP, using eager mode: {e}")
+            self.blip_model.vision_model = self._blip_vision_eager
+            self._blip_vision_eager = None
+            return self._generate_captions(images)
+    
+    def _generate_captions(self, images: list) -> list:
+        """Run BLIP generate once over stacked images (greedy, reduced precision where supported)."""
+        batch = torch.stack([self.blip_transform(image) for image in images])
+        batch = batch.to(self.device, dtype=self.blip_model.dtype)
+        if self.device == "cuda":
+            batch = batch.contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode(), torch.autocast(
+            self.device,
+            dtype=self._blip_autocast or torch.float32,
+            enabled=self._blip_autocast is not None,
+        ):
+            outputs = self.blip_model.generate(pixel_values=batch)
+        return self.blip_processor.batch_decode(outputs, skip_special_tokens=True)
+    
     def analyze(self, image_path: str, use_deepseek: bool = True) -> ForensicResult:
         """Public method for analysis."""
         return self.process(image_path)
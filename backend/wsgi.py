@@ -1,10 +1,28 @@
 """
 WSGI Entry Point for Gunicorn
+
+Con `gunicorn --preload` este módulo se importa en el proceso maestro:
+los pesos de los modelos se cargan ahí una vez en memoria compartida y
+los workers los heredan tras el fork. El precalentamiento de detectores
+se hace en cada worker, después del fork.
 """
 
-from app import create_app
+import os
+
+from app import create_app, start_warmup
+from backend import database
+from core.model_manager import configurar_runtime, precargar_pesos_compartidos
+import config
+
+configurar_runtime()
+precargar_pesos_compartidos()
+
+app = create_app(warmup=False)
 
-app = create_app()
+# Los hilos no sobreviven al fork: cada worker arranca los suyos
+os.register_at_fork(after_in_child=database.start_maintenance)
+if config.WARMUP_ON_START:
+    os.register_at_fork(after_in_child=start_warmup)
 
 if __name__ == '__main__':
     app.run()
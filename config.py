@@ -12,8 +12,11 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent.resolve()
 BACKEND_DIR = BASE_DIR / "backend"
 WEIGHTS_DIR = BASE_DIR / "weights"
-UPLOAD_FOLDER = BACKEND_DIR / "uploads"
+# Subidas temporales; en Linux puede apuntarse a tmpfs (p. ej. UPLOAD_FOLDER=/dev/shm/iadetector)
+UPLOAD_FOLDER = Path(os.getenv("UPLOAD_FOLDER", BACKEND_DIR / "uploads"))
 LOGS_DIR = BACKEND_DIR / "logs"
+# Caché persistente de modelos (HuggingFace hub y marca de precalentamiento)
+MODEL_CACHE_DIR = Path(os.getenv("UIDE_CACHE_DIR", Path.home() / ".cache" / "uide_forense"))
 
 # ==========================================
 # 🌐 Flask Configuration
@@ -37,6 +40,8 @@ ALLOWED_EXTENSIONS_AUDIO = {'mp3', 'wav', 'm4a', 'ogg', 'flac'}
 # 🖼️ Image Forensics Configuration
 # ==========================================
 
+MAX_IMAGE_SIZE_MB = 20  # 20MB máximo para imágenes
+
 # CLIP
 CLIP_MODEL_NAME = "ViT-L/14"
 
@@ -67,7 +72,26 @@ MAX_VIDEO_DURATION_SECONDS = 120  # 2 minutos máximo
 VIDEO_SIZE = 299  # Tamaño de frame para XceptionNet (299x299)
 MODEL_VIDEO_NAME = 'xception'  # Modelo timm para detección de deepfakes
 VIDEO_FRAME_STRIDE = 30  # Analizar 1 frame cada 30
+VIDEO_BATCH_SIZE = 16  # Rostros por forward de XceptionNet
+VIDEO_PREFETCH_BATCHES = 1  # Lotes en vuelo en GPU mientras se decodifican los siguientes
+VIDEO_ADAPTIVE_SAMPLING = True  # Aumentar el stride en segmentos con scores estables
+VIDEO_ADAPTIVE_STD = 2.0  # Desviación (0-100) bajo la cual los scores se consideran estables
+VIDEO_ADAPTIVE_MAX_FACTOR = 4  # Stride máximo = VIDEO_FRAME_STRIDE * factor
 MIN_FACES_REQUIRED = 5  # Mínimo de rostros para análisis confiable
+# Detector de rostros YuNet (opencv-zoo); si el archivo no existe se usa Haar Cascade
+YUNET_MODEL_PATH = WEIGHTS_DIR / "face_detection_yunet_2023mar.onnx"
+YUNET_SCORE_THRESHOLD = 0.6
+FACE_DETECT_WIDTH = 640  # Ancho de trabajo para detectar rostros (la caja se re-escala al original)
+FACE_TRACKING = True  # Seguir el rostro con KCF entre detecciones (requiere opencv-contrib)
+FACE_REDETECT_EVERY = 10  # Frames muestreados seguidos con tracker antes de volver a detectar
+# KCF asume movimiento pequeño entre frames: con un stride mayor se detecta en cada frame muestreado
+FACE_TRACKING_MAX_STRIDE = 4
+# Salida temprana: detener el análisis cuando la media de frames ya es concluyente (0-100)
+EARLY_EXIT_HIGH = 95.0
+EARLY_EXIT_LOW = 5.0
+EARLY_EXIT_MIN_FRAMES = 20
+PLOT_WORKERS = 2  # Procesos para renderizar la línea de tiempo (matplotlib)
+VIDEO_UI_UPDATE_S = 0.5  # Intervalo mínimo entre actualizaciones del log en la interfaz
 VIDEO_THRESHOLD = 50.0  # Umbral de detección de deepfake (0-100)
 
 # ==========================================
@@ -77,6 +101,9 @@ SUPPORTED_AUDIO_FORMATS = {'.mp3', '.wav', '.m4a', '.ogg', '.flac'}
 MAX_AUDIO_SIZE_MB = 20  # 20MB máximo
 AUDIO_SAMPLE_RATE = 16000  # Hz
 AUDIO_MAX_DURATION = 60  # 60 segundos máximo
+# Caché en disco (MODEL_CACHE_DIR/audio_features) del análisis por contenido del archivo
+AUDIO_FEATURE_CACHE = os.getenv("AUDIO_FEATURE_CACHE", "true").lower() == "true"
+AUDIO_FEATURE_CACHE_MAX_ENTRIES = 512  # Al superarse se borran las entradas usadas hace más tiempo
 # Detección heurística basada en análisis espectral (sin modelo pesado)
 
 # ==========================================
@@ -85,7 +112,8 @@ AUDIO_MAX_DURATION = 60  # 60 segundos máximo
 DEEPSEEK_ENABLED = os.getenv("DEEPSEEK_ENABLED", "false").lower() == "true"
 DEEPSEEK_API_URL = os.getenv("DEEPSEEK_API_URL", "http://localhost:11434/api/generate")
 DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-r1:7b")
-DEEPSEEK_TIMEOUT = int(os.getenv("DEEPSEEK_TIMEOUT", "60"))
+DEEPSEEK_TIMEOUT = int(os.getenv("DEEPSEEK_TIMEOUT", "60"))  # Lectura: máximo entre bytes de la respuesta
+DEEPSEEK_CONNECT_TIMEOUT = float(os.getenv("DEEPSEEK_CONNECT_TIMEOUT", "3.05"))
 DEEPSEEK_MAX_RETRIES = int(os.getenv("DEEPSEEK_MAX_RETRIES", "3"))
 DEEPSEEK_TEMPERATURE = float(os.getenv("DEEPSEEK_TEMPERATURE", "0.3"))
 
@@ -107,8 +135,39 @@ FUSION_THRESHOLDS = {
 # 🔧 Technical Settings
 # ==========================================
 DEVICE = os.getenv("DEVICE", "cpu")  # 'cuda' si hay GPU
+INFERENCE_DTYPE = os.getenv("INFERENCE_DTYPE", "fp16")  # 'fp16' | 'bf16' | 'fp32' (solo aplica en CUDA)
+USE_TORCH_COMPILE = os.getenv("USE_TORCH_COMPILE", "true").lower() == "true"  # torch.compile en modelos de ModelManager
+# Alternativa a torch.compile para XceptionNet: grafo trazado + congelado, guardado en MODEL_CACHE_DIR
+USE_TORCH_JIT = os.getenv("USE_TORCH_JIT", "false").lower() == "true"
+# Cuantización INT8 estática (FBGEMM/x86) de ResNet50 en CPU, calibrada con imágenes de muestra
+QUANTIZE_INT8 = os.getenv("QUANTIZE_INT8", "false").lower() == "true"
+QUANTIZE_CALIBRATION_DIR = BASE_DIR / "samples"
+QUANTIZE_MAX_DELTA = 0.02  # Diferencia máxima de probabilidad (0-1) vs FP32 en las imágenes de control
+# Cuantización de BLIP en CUDA con bitsandbytes: '4bit' (NF4) | '8bit' | 'none' (FP16)
+BLIP_QUANTIZATION = os.getenv("BLIP_QUANTIZATION", "4bit")
 NUM_WORKERS = int(os.getenv("NUM_WORKERS", "4"))
+# Hilos de cómputo: PyTorch usa la mitad de los núcleos y OpenCV uno solo
+# para no competir entre sí (ver core.model_manager.configurar_runtime)
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", max(1, (os.cpu_count() or 2) // 2)))
+OPENCV_NUM_THREADS = int(os.getenv("OPENCV_NUM_THREADS", "1"))
 ENABLE_CACHE = True
+ENABLE_CACHE_CLEANING = True  # Liberar la caché del allocator CUDA tras cada video
+RESULT_CACHE_SIZE = 128  # Entradas en la caché LRU de resultados por contenido
+RESULT_CACHE_MAX_MB = 32  # No cachear imágenes mayores a este tamaño en memoria
+IMAGE_IN_MEMORY_MAX_MB = 8  # Imágenes de la API hasta este tamaño se analizan sin escribirse a disco
+# Caché perceptual de expertos: opcional (0 = deshabilitada). Una copia recomprimida
+# o retocada localmente reutilizaría el veredicto del original
+PHASH_CACHE_SIZE = int(os.getenv("PHASH_CACHE_SIZE", "0"))  # Entradas de la caché perceptual
+PHASH_MAX_DISTANCE = 6  # Distancia de Hamming máxima (de 64 bits) para reutilizar
+IMAGE_BATCH_MAX = 8  # Máximo de imágenes concurrentes agrupadas en un lote
+IMAGE_BATCH_WINDOW_MS = 20  # Ventana de espera para completar un lote
+# Cola de Gradio: concurrencia por tipo de análisis
+GRADIO_CONCURRENCY = 4  # Límite por defecto de eventos simultáneos
+GRADIO_MAX_QUEUE = 64  # Solicitudes en espera antes de rechazar
+VIDEO_CONCURRENCY = 1  # Video es el más pesado en GPU
+AUDIO_CONCURRENCY = 8  # Audio es CPU (librosa)
+# Precalentar los detectores al arrancar (evita la latencia de carga en la primera solicitud)
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "true").lower() == "true"
 
 # Transforms
 TRANSFORMS_RESIZE = (224, 224)
@@ -4,11 +4,12 @@ UIDE Forense AI
 """
 
 from .model_manager import ModelManager
-from .processor import preprocess_image, preprocess_video_frame, preprocess_audio
+from .processor import preprocess_image, preprocess_video_frame, preprocess_audio, expand_face_region
 
 __all__ = [
     'ModelManager',
     'preprocess_image',
     'preprocess_video_frame', 
     'preprocess_audio',
+    'expand_face_region',
 ]
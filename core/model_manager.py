@@ -7,19 +7,66 @@ con soporte para lazy loading y manejo robusto de errores.
 """
 
 import os
+import copy
 import logging
-from typing import Optional
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
+import cv2
+import numpy as np
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 from torchvision import models, transforms
 import timm
 
 import config
+from core.processor import bgr_to_normalized_chw
+from core.models_loader import get_shared_state_dict, load_checkpoint
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+_runtime_configurado = False
+
+
+def configurar_runtime() -> None:
+    """
+    Ajusta hilos y flags de cuDNN una sola vez por proceso.
+    
+    Debe llamarse al arrancar, antes de la primera operación de PyTorch:
+    el número de hilos inter-op no puede cambiarse después.
+    """
+    global _runtime_configurado
+    if _runtime_configurado:
+        return
+    _runtime_configurado = True
+    
+    # OpenCV y PyTorch compiten por los mismos núcleos
+    cv2.setNumThreads(config.OPENCV_NUM_THREADS)
+    torch.set_num_threads(config.TORCH_NUM_THREADS)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError as e:
+        logger.debug(f"Hilos inter-op ya fijados: {e}")
+    
+    if torch.cuda.is_available():
+        # Entradas de tamaño fijo (224/299): cuDNN cachea el mejor algoritmo
+        torch.backends.cudnn.benchmark = True
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+    
+    logger.info(
+        f"⚙️ Hilos: torch={config.TORCH_NUM_THREADS}, opencv={config.OPENCV_NUM_THREADS}"
+    )
+    
+    # Los wheels de Pillow incluyen libjpeg-turbo (SIMD); un build local
+    # contra libjpeg estándar decodifica JPEG varias veces más lento
+    from PIL import features
+    if not features.check_feature("libjpeg_turbo"):
+        logger.warning("⚠️ Pillow no usa libjpeg-turbo: la decodificación JPEG será lenta")
+
 
 class ModelManager:
     """
@@ -31,10 +78,20 @@ class ModelManager:
         self.modelo_imagen_gan: Optional[nn.Module] = None
         self.modelo_video: Optional[nn.Module] = None
         self.dispositivo = torch.device(config.DEVICE)
+        self.dtype = self._resolver_dtype()
+        # Stream dedicado para solapar inferencia de video con decodificación
+        self.stream = torch.cuda.Stream() if self.dispositivo.type == "cuda" else None
+        # NHWC activa los kernels de tensor cores de cuDNN para convoluciones
+        self.memory_format = (
+            torch.channels_last if self.dispositivo.type == "cuda" else torch.contiguous_format
+        )
         
         # Estado de carga
         self._imagen_gan_cargado = False
         self._video_cargado = False
+        # Un lock por modelo: dos solicitudes concurrentes no lo cargan dos veces
+        self._lock_imagen_gan = threading.Lock()
+        self._lock_video = threading.Lock()
 
         # Transformaciones de imagen (CNNDetection - ResNet50)
         self.transform_imagen = transforms.Compose([
@@ -54,8 +111,268 @@ class ModelManager:
             transforms.Normalize([0.5] * 3, [0.5] * 3),
         ])
 
+        # Constantes de normalización en el dispositivo (se crean una sola vez)
+        self._mean_imagen = self._constante(config.TRANSFORMS_MEAN)
+        self._std_imagen = self._constante(config.TRANSFORMS_STD)
+        self._mean_video = self._constante([0.5] * 3)
+        self._std_video = self._constante([0.5] * 3)
+        # Buffers de entrada preasignados por hilo (ver _buffer)
+        self._tls = threading.local()
+
         logger.info("📦 ModelManager inicializado (lazy loading activado)")
 
+    def _constante(self, valores) -> torch.Tensor:
+        """Crea un tensor (1, 3, 1, 1) en el dispositivo para normalizar lotes NCHW."""
+        return torch.tensor(valores, dtype=torch.float32, device=self.dispositivo).view(1, 3, 1, 1)
+
+    def _a_tensor(self, array: np.ndarray, bgr: bool = False) -> torch.Tensor:
+        """
+        Sube un array HWC (o NHWC) uint8 al dispositivo como tensor NCHW en [0, 1].
+        
+        Se transfiere en uint8 (4x menos datos que float32) y la conversión
+        de tipo, el reordenamiento de canales y la escala se hacen en destino.
+        """
+        t = torch.from_numpy(np.ascontiguousarray(array)).to(self.dispositivo, non_blocking=True)
+        if t.dim() == 3:
+            t = t.unsqueeze(0)
+        t = t.permute(0, 3, 1, 2)
+        if bgr:
+            t = t.flip(1)
+        return t.float().div_(255.0)
+
+    def _buffer(self, nombre: str, shape: Tuple[int, ...], capacidad: int = 1) -> torch.Tensor:
+        """
+        Retorna un buffer de entrada reutilizable con la forma pedida.
+        
+        El buffer vive en el dispositivo con el dtype y layout de los
+        modelos (preparar_entrada no copia) y se reserva con al menos
+        `capacidad` filas, de modo que los lotes parciales lo reutilizan.
+        Es por hilo: dos análisis concurrentes nunca comparten memoria.
+        
+        Args:
+            nombre: Identificador del buffer ("imagen", "video", ...)
+            shape: Forma NCHW requerida
+            capacidad: Número mínimo de filas a reservar
+        """
+        buffers = getattr(self._tls, "buffers", None)
+        if buffers is None:
+            buffers = self._tls.buffers = {}
+        
+        buf = buffers.get(nombre)
+        if buf is None or buf.shape[0] < shape[0] or buf.shape[1:] != shape[1:]:
+            filas = max(shape[0], capacidad)
+            buf = torch.empty(
+                (filas,) + tuple(shape[1:]), dtype=self.dtype, device=self.dispositivo
+            ).contiguous(memory_format=self.memory_format)
+            buffers[nombre] = buf
+        return buf[:shape[0]]
+
+    def preprocesar_imagen(self, imagen: np.ndarray) -> torch.Tensor:
+        """
+        Equivalente tensorial de transform_imagen (Resize + CenterCrop + Normalize).
+        
+        Evita el paso por PIL: el redimensionado se hace con F.interpolate
+        directamente en el dispositivo (GPU si está disponible).
+        
+        Args:
+            imagen: Array RGB uint8 (H, W, 3)
+            
+        Returns:
+            Tensor (1, 3, CROP, CROP) listo para preparar_entrada. Comparte
+            memoria con el buffer del hilo: se sobrescribe en la siguiente llamada.
+        """
+        t = F.interpolate(self._a_tensor(imagen), size=config.TRANSFORMS_RESIZE,
+                          mode="bilinear", align_corners=False, antialias=True)
+        crop = config.TRANSFORMS_CROP
+        top = (t.shape[2] - crop) // 2
+        left = (t.shape[3] - crop) // 2
+        t = t[:, :, top:top + crop, left:left + crop]
+        
+        salida = self._buffer("imagen", (1, 3, crop, crop))
+        return salida.copy_(t.sub_(self._mean_imagen).div_(self._std_imagen))
+
+    def preprocesar_rostros(self, rostros: List[np.ndarray]) -> torch.Tensor:
+        """
+        Equivalente de transform_video para un lote de recortes.
+        
+        Cada recorte se redimensiona una vez con cv2.resize. En CPU la
+        conversión BGR→RGB + normalización se escribe directamente en el
+        buffer de entrada (bgr_to_normalized_chw); en GPU el lote uint8 se
+        sube en una sola copia y se normaliza en el dispositivo.
+        
+        Args:
+            rostros: Recortes BGR uint8 (H, W, 3) de tamaño variable
+            
+        Returns:
+            Tensor (N, 3, VIDEO_SIZE, VIDEO_SIZE) normalizado en el dispositivo.
+            Comparte memoria con el buffer del hilo (como preprocesar_imagen).
+        """
+        size = (config.VIDEO_SIZE, config.VIDEO_SIZE)
+        lote = self._buffer("video", (len(rostros), 3) + size, capacidad=config.VIDEO_BATCH_SIZE)
+        recortes = [
+            cv2.resize(
+                rostro, size,
+                interpolation=cv2.INTER_AREA if rostro.shape[0] > size[0] else cv2.INTER_LINEAR,
+            )
+            for rostro in rostros
+        ]
+        
+        if lote.device.type == "cpu" and lote.dtype == torch.float32:
+            destino = lote.numpy()
+            for j, recorte in enumerate(recortes):
+                bgr_to_normalized_chw(recorte, destino[j])
+            return lote
+        
+        t = self._a_tensor(np.stack(recortes), bgr=True)
+        return lote.copy_(t.sub_(self._mean_video).div_(self._std_video))
+
+    def _resolver_dtype(self) -> torch.dtype:
+        """
+        Determina el dtype de inferencia según config.INFERENCE_DTYPE.
+        
+        La media precisión solo se usa en CUDA; en CPU se mantiene float32.
+        """
+        dtypes = {"fp16": torch.float16, "bf16": torch.bfloat16}
+        dtype = dtypes.get(getattr(config, "INFERENCE_DTYPE", "fp32"), torch.float32)
+        if self.dispositivo.type != "cuda":
+            return torch.float32
+        logger.info(f"⚙️ Dtype de inferencia: {dtype}")
+        return dtype
+
+    def _compilar(self, model: nn.Module, input_size: int, max_batch: int = 1) -> nn.Module:
+        """
+        Compila el modelo con torch.compile si está habilitado.
+        
+        La compilación es diferida: se fuerza con forwards de prueba para
+        que la primera solicitud real no pague el costo, y si el backend
+        (inductor) no está disponible se conserva el modelo eager.
+        
+        Se usa el modo por defecto, sin CUDA graphs: el modelo se llama
+        desde varios hilos con lotes de tamaño variable, y las salidas de
+        un grafo se sobrescriben en la siguiente reproducción. Los forwards
+        con lote 1 y `max_batch` hacen que la dimensión de lote se compile
+        como dinámica antes de la primera solicitud.
+        
+        Args:
+            model: Modelo ya en su dispositivo y en modo eval
+            input_size: Lado de la entrada cuadrada esperada
+            max_batch: Mayor tamaño de lote que se sirve
+        """
+        if not (config.USE_TORCH_COMPILE and hasattr(torch, "compile")):
+            return model
+        
+        try:
+            compilado = torch.compile(model, fullgraph=False)
+            with torch.inference_mode(), self.autocast():
+                for n in sorted({1, max(1, max_batch)}):
+                    compilado(self.preparar_entrada(torch.zeros(n, 3, input_size, input_size)))
+            logger.info("⚡ Modelo compilado con torch.compile")
+            return compilado
+        except Exception as e:
+            logger.warning(f"⚠️ torch.compile no disponible, se usa modo eager: {e}")
+            return model
+
+    def _ruta_jit(self, nombre: str) -> Path:
+        """Ruta del grafo TorchScript cacheado (depende de dispositivo y dtype)."""
+        dtype = str(self.dtype).replace("torch.", "")
+        return config.MODEL_CACHE_DIR / "jit" / f"{nombre}_{self.dispositivo.type}_{dtype}.pt"
+
+    def _trazar(self, model: nn.Module, input_size: int, ruta: Path) -> nn.Module:
+        """
+        Traza el modelo con torch.jit.trace, lo congela y lo guarda en disco.
+        
+        Para arquitecturas de grafo estático (XceptionNet con entrada fija)
+        elimina el despacho de Python entre kernels; torch.jit.freeze además
+        pliega BatchNorm y constantes. El siguiente arranque carga el grafo
+        directamente. Si algo falla se conserva el modelo eager.
+        
+        Args:
+            model: Modelo ya en su dispositivo y en modo eval
+            input_size: Lado de la entrada cuadrada esperada
+            ruta: Archivo donde guardar el grafo congelado
+        """
+        try:
+            ejemplo = self.preparar_entrada(torch.zeros(1, 3, input_size, input_size))
+            with torch.inference_mode(), self.autocast():
+                trazado = torch.jit.trace(model, ejemplo, check_trace=False)
+            trazado = torch.jit.freeze(trazado)
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            torch.jit.save(trazado, str(ruta))
+            logger.info(f"⚡ Modelo trazado con TorchScript ({ruta})")
+            return trazado
+        except Exception as e:
+            logger.warning(f"⚠️ torch.jit.trace falló, se usa modo eager: {e}")
+            return model
+
+    def _imagenes_calibracion(self) -> List[torch.Tensor]:
+        """Tensores preprocesados de las imágenes en QUANTIZE_CALIBRATION_DIR."""
+        from PIL import Image
+        
+        tensores = []
+        carpeta = Path(config.QUANTIZE_CALIBRATION_DIR)
+        if not carpeta.is_dir():
+            return tensores
+        for ruta in sorted(carpeta.iterdir()):
+            if ruta.suffix.lower().lstrip(".") not in config.ALLOWED_EXTENSIONS_IMAGE:
+                continue
+            try:
+                with Image.open(ruta) as img:
+                    arr = np.asarray(img.convert("RGB"))
+                # clone(): preprocesar_imagen escribe en el buffer del hilo
+                tensores.append(self.preprocesar_imagen(arr).clone())
+            except Exception as e:
+                logger.debug(f"Imagen de calibración ignorada ({ruta.name}): {e}")
+        return tensores
+
+    def _cuantizar_int8(self, model: nn.Module, nombre: str) -> nn.Module:
+        """
+        Cuantiza el modelo a INT8 (post-training estático, FX graph mode).
+        
+        Los observadores se calibran con las imágenes de muestra; las mismas
+        imágenes sirven de control: si la probabilidad INT8 se aleja más de
+        QUANTIZE_MAX_DELTA de la FP32 se conserva el modelo FP32. El grafo
+        cuantizado se guarda con TorchScript para los siguientes arranques.
+        
+        Args:
+            model: ResNet50 FP32 en CPU y en modo eval
+            nombre: Nombre base del archivo cacheado
+        """
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+        
+        muestras = self._imagenes_calibracion()
+        if not muestras:
+            logger.warning("⚠️ Sin imágenes de calibración, se mantiene FP32")
+            return model
+        
+        try:
+            preparado = prepare_fx(
+                copy.deepcopy(model), get_default_qconfig_mapping("x86"), (muestras[0],)
+            )
+            with torch.inference_mode():
+                for muestra in muestras:
+                    preparado(muestra)
+            cuantizado = convert_fx(preparado)
+            
+            lote = torch.cat(muestras)
+            with torch.inference_mode():
+                delta = (
+                    torch.sigmoid(cuantizado(lote)) - torch.sigmoid(model(lote))
+                ).abs().max().item()
+            if delta > config.QUANTIZE_MAX_DELTA:
+                logger.warning(f"⚠️ INT8 difiere {delta:.3f} de FP32, se mantiene FP32")
+                return model
+            
+            trazado = torch.jit.freeze(torch.jit.trace(cuantizado, muestras[0]))
+            ruta = self._ruta_jit(f"{nombre}_int8")
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            torch.jit.save(trazado, str(ruta))
+            logger.info(f"⚡ ResNet50 cuantizado a INT8 (delta={delta:.4f}, {ruta})")
+            return trazado
+        except Exception as e:
+            logger.warning(f"⚠️ Cuantización INT8 falló, se mantiene FP32: {e}")
+            return model
+
     def cargar_modelo_imagen_gan(self) -> Optional[nn.Module]:
         """
         Carga el modelo de detección de imágenes GAN (ResNet50 Modificado).
@@ -63,7 +380,14 @@ class ModelManager:
         """
         if self._imagen_gan_cargado:
             return self.modelo_imagen_gan
-            
+        
+        with self._lock_imagen_gan:
+            if self._imagen_gan_cargado:
+                return self.modelo_imagen_gan
+            return self._cargar_imagen_gan()
+
+    def _cargar_imagen_gan(self) -> Optional[nn.Module]:
+        """Carga ResNet50 (llamar con _lock_imagen_gan tomado)."""
         logger.info("🖼️ Cargando modelo de imágenes GAN (ResNet50)...")
 
         try:
@@ -76,6 +400,14 @@ class ModelManager:
                 self._imagen_gan_cargado = True
                 return None
 
+            ruta_int8 = self._ruta_jit(f"{Path(model_path).stem}_int8")
+            if self.dispositivo.type == "cpu" and config.QUANTIZE_INT8 and ruta_int8.exists():
+                model = torch.jit.load(str(ruta_int8), map_location=self.dispositivo)
+                logger.info(f"⚡ Modelo INT8 cargado desde {ruta_int8}")
+                self.modelo_imagen_gan = model
+                self._imagen_gan_cargado = True
+                return model
+
             # 1. Cargar arquitectura base ResNet50
             model = models.resnet50(pretrained=False)
 
@@ -85,22 +417,16 @@ class ModelManager:
 
             # 3. Cargar los pesos
             logger.info(f"📂 Leyendo pesos desde {model_path}")
-            state_dict = torch.load(model_path, map_location=self.dispositivo)
-
-            # Manejo de diccionarios de pesos
-            if "model" in state_dict:
-                state_dict = state_dict["model"]
-
-            # Limpieza de llaves (si vienen con prefix 'module.')
-            new_state_dict = {}
-            for k, v in state_dict.items():
-                k = k.replace("module.", "")
-                new_state_dict[k] = v
+            # assign=True usa los tensores mapeados sin copiarlos (el .to() siguiente
+            # copia si cambia el dtype o el layout, p. ej. fp16/channels_last en CUDA)
+            model.load_state_dict(_pesos_imagen_gan(), strict=True, assign=True)
 
-            model.load_state_dict(new_state_dict, strict=True)
-
-            model.to(self.dispositivo)
+            model.to(self.dispositivo, dtype=self.dtype, memory_format=self.memory_format)
             model.eval()
+            if self.dispositivo.type == "cpu" and config.QUANTIZE_INT8:
+                model = self._cuantizar_int8(model, Path(model_path).stem)
+            else:
+                model = self._compilar(model, config.TRANSFORMS_CROP, config.IMAGE_BATCH_MAX)
 
             self.modelo_imagen_gan = model
             self._imagen_gan_cargado = True
@@ -123,17 +449,34 @@ class ModelManager:
         """
         if self._video_cargado:
             return self.modelo_video
-            
+        
+        with self._lock_video:
+            if self._video_cargado:
+                return self.modelo_video
+            return self._cargar_video()
+
+    def _cargar_video(self) -> Optional[nn.Module]:
+        """Carga XceptionNet (llamar con _lock_video tomado)."""
         logger.info("🎥 Cargando modelo de video (XceptionNet)...")
 
         try:
-            modelo = timm.create_model(
-                config.MODEL_VIDEO_NAME,
-                pretrained=True,
-                num_classes=2,
-            )
-            modelo.to(self.dispositivo)
-            modelo.eval()
+            ruta_jit = self._ruta_jit(config.MODEL_VIDEO_NAME)
+            if config.USE_TORCH_JIT and ruta_jit.exists():
+                modelo = torch.jit.load(str(ruta_jit), map_location=self.dispositivo)
+                logger.info(f"⚡ Grafo TorchScript cargado desde {ruta_jit}")
+            else:
+                modelo = timm.create_model(
+                    config.MODEL_VIDEO_NAME,
+                    pretrained=False,
+                    num_classes=2,
+                )
+                modelo.load_state_dict(_pesos_video(), strict=True, assign=True)
+                modelo.to(self.dispositivo, dtype=self.dtype, memory_format=self.memory_format)
+                modelo.eval()
+                if config.USE_TORCH_JIT:
+                    modelo = self._trazar(modelo, config.VIDEO_SIZE, ruta_jit)
+                else:
+                    modelo = self._compilar(modelo, config.VIDEO_SIZE, config.VIDEO_BATCH_SIZE)
 
             self.modelo_video = modelo
             self._video_cargado = True
@@ -153,17 +496,85 @@ class ModelManager:
         """Retorna el dispositivo configurado (CPU/CUDA)."""
         return self.dispositivo
 
+    def get_dtype(self) -> torch.dtype:
+        """Retorna el dtype de inferencia de los modelos cargados."""
+        return self.dtype
+
+    def get_stream(self) -> Optional["torch.cuda.Stream"]:
+        """Retorna el stream CUDA de inferencia (None en CPU)."""
+        return self.stream
+
+    def preparar_entrada(self, tensor: torch.Tensor) -> torch.Tensor:
+        """Mueve un lote NCHW al dispositivo con el dtype y layout de los modelos."""
+        return tensor.to(
+            self.dispositivo,
+            dtype=self.dtype,
+            memory_format=self.memory_format,
+            non_blocking=True,
+        )
+
+    def autocast(self):
+        """
+        Contexto de precisión mixta en el dtype de inferencia (config.INFERENCE_DTYPE).
+        
+        Solo se activa en CUDA con fp16/bf16; con fp32 (y en CPU) es un no-op.
+        """
+        media = self.dtype in (torch.float16, torch.bfloat16)
+        return torch.autocast(
+            device_type=self.dispositivo.type,
+            dtype=self.dtype if media else torch.float16,
+            enabled=media and self.dispositivo.type == "cuda",
+        )
+
+
+def _pesos_imagen_gan() -> Dict[str, torch.Tensor]:
+    """Pesos de ResNet50 (CNNDetection), mapeados desde el checkpoint (sin copia a /dev/shm)."""
+    path = str(config.MODEL_IMAGE_PATH)
+    return get_shared_state_dict(path, lambda: load_checkpoint(path), share_memory=False)
+
+
+def _pesos_video() -> Dict[str, torch.Tensor]:
+    """Pesos pre-entrenados de XceptionNet en memoria compartida."""
+    return get_shared_state_dict(
+        config.MODEL_VIDEO_NAME,
+        lambda: timm.create_model(
+            config.MODEL_VIDEO_NAME, pretrained=True, num_classes=2
+        ).state_dict(),
+    )
+
+
+def precargar_pesos_compartidos() -> None:
+    """
+    Carga los pesos de los modelos CNN en memoria compartida.
+    
+    Pensado para el proceso maestro de gunicorn (--preload): no crea el
+    ModelManager ni toca CUDA, de modo que los workers pueden inicializar
+    su propio contexto tras el fork y heredan los pesos sin copiarlos.
+    """
+    try:
+        if os.path.exists(config.MODEL_IMAGE_PATH):
+            _pesos_imagen_gan()
+        _pesos_video()
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudieron precargar los pesos compartidos: {e}")
+
 
 # Singleton global del gestor de modelos
 _model_manager_instance: Optional[ModelManager] = None
+_model_manager_lock = threading.Lock()
 
 
 def get_model_manager() -> ModelManager:
     """
     Obtiene la instancia singleton del ModelManager.
     Crea una nueva instancia si no existe.
+    
+    Thread-safe: con Flask multi-hilo dos solicitudes simultáneas no deben
+    crear dos gestores (y cargar cada modelo dos veces).
     """
     global _model_manager_instance
     if _model_manager_instance is None:
-        _model_manager_instance = ModelManager()
+        with _model_manager_lock:
+            if _model_manager_instance is None:
+                _model_manager_instance = ModelManager()
     return _model_manager_instance
@@ -0,0 +1,82 @@
+"""
+Models Loader - Pesos compartidos entre procesos
+UIDE Forense AI
+
+Los state_dict se cargan una sola vez por proceso. Con gunicorn --preload
+el proceso maestro los carga antes del fork y cada worker construye su
+modelo apuntando a los mismos buffers (copy-on-write), en lugar de leer
+cientos de MB por worker.
+
+Limitación: el reparto solo se mantiene si el modelo usa los tensores tal
+cual (fp32, contiguos, en CPU). ModelManager convierte a fp16/bf16 y a
+channels_last en CUDA, y esa conversión hace una copia por worker.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Caché de proceso: clave → state_dict en memoria compartida
+_SHARED_STATE_DICTS: Dict[str, Dict[str, torch.Tensor]] = {}
+_lock = threading.Lock()
+
+
+def load_checkpoint(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Lee un checkpoint (.pth) en CPU con mmap y limpia sus llaves.
+
+    Acepta checkpoints envueltos en {"model": ...} y elimina el prefijo
+    'module.' de DataParallel.
+    """
+    # mmap evita materializar el checkpoint completo en RAM;
+    # weights_only impide ejecutar código arbitrario del pickle
+    state_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    state_dict = state_dict.get("model", state_dict)
+    return {
+        (k[7:] if k.startswith("module.") else k): v
+        for k, v in state_dict.items()
+    }
+
+
+def get_shared_state_dict(
+    key: str,
+    loader: Callable[[], Dict[str, torch.Tensor]],
+    share_memory: bool = True,
+) -> Dict[str, torch.Tensor]:
+    """
+    Retorna el state_dict de `key`, cargándolo con `loader` la primera vez.
+
+    Con `share_memory` cada tensor se mueve a memoria compartida
+    (share_memory_), por lo que los procesos hijos creados después
+    reutilizan los mismos buffers. Para checkpoints leídos con mmap
+    (load_checkpoint) debe ser False: share_memory_ copiaría cada peso a
+    /dev/shm, y las páginas del archivo ya se comparten copy-on-write
+    entre procesos tras el fork.
+
+    Args:
+        key: Identificador del modelo (p. ej. la ruta del checkpoint)
+        loader: Función que retorna el state_dict en CPU
+        share_memory: Mover los tensores a memoria compartida
+
+    Returns:
+        state_dict listo para load_state_dict(..., assign=True)
+    """
+    with _lock:
+        state_dict = _SHARED_STATE_DICTS.get(key)
+        if state_dict is None:
+            state_dict = loader()
+            if share_memory:
+                state_dict = {k: v.share_memory_() for k, v in state_dict.items()}
+                logger.info(f"🔗 Pesos de '{key}' en memoria compartida")
+            _SHARED_STATE_DICTS[key] = state_dict
+        return state_dict
+
+
+def clear_shared_state_dicts() -> None:
+    """Libera las referencias a los pesos compartidos de este proceso."""
+    with _lock:
+        _SHARED_STATE_DICTS.clear()
@@ -11,9 +11,57 @@ from typing import Tuple, Optional
 from PIL import Image
 import numpy as np
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba es opcional; se usa la versión numpy
+    njit = None
+
 logger = logging.getLogger(__name__)
 
 
+def _bgr_to_normalized_chw_numpy(src: np.ndarray, dst: np.ndarray) -> None:
+    """Versión numpy de bgr_to_normalized_chw (tres pasadas vectorizadas)."""
+    np.multiply(src[:, :, ::-1].transpose(2, 0, 1), 1.0 / 127.5, out=dst, casting="unsafe")
+    dst -= 1.0
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _bgr_to_normalized_chw_numba(src, dst):
+        alto, ancho = src.shape[0], src.shape[1]
+        escala = np.float32(1.0 / 127.5)
+        uno = np.float32(1.0)
+        for y in prange(alto):
+            # Escrituras contiguas por canal; aritmética en float32
+            for c in range(3):
+                for x in range(ancho):
+                    dst[c, y, x] = src[y, x, 2 - c] * escala - uno
+else:
+    _bgr_to_normalized_chw_numba = None
+
+
+def bgr_to_normalized_chw(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Convierte un recorte BGR uint8 (H, W, 3) a RGB float32 (3, H, W) en [-1, 1].
+    
+    Equivale a ToTensor() + Normalize([0.5]*3, [0.5]*3) de XceptionNet,
+    pero en una sola pasada (kernel Numba si está instalado) y escribiendo
+    en un buffer preasignado.
+    
+    Args:
+        src: Recorte BGR uint8 ya redimensionado
+        dst: Buffer float32 (3, H, W) de destino
+        
+    Returns:
+        dst
+    """
+    if _bgr_to_normalized_chw_numba is not None:
+        _bgr_to_normalized_chw_numba(src, dst)
+    else:
+        _bgr_to_normalized_chw_numpy(src, dst)
+    return dst
+
+
 def preprocess_image(image_array: np.ndarray) -> Image.Image:
     """
     Pre-procesa una imagen desde array numpy a PIL Image.
@@ -32,6 +80,34 @@ def preprocess_image(image_array: np.ndarray) -> Image.Image:
         raise
 
 
+def expand_face_region(
+    frame_shape: Tuple[int, ...],
+    face_region: Tuple[int, int, int, int],
+    margin_ratio: float = 0.2
+) -> Tuple[int, int, int, int]:
+    """
+    Calcula la región del rostro con margen, recortada a los límites del frame.
+    
+    Args:
+        frame_shape: Shape del frame (alto, ancho, ...)
+        face_region: Tupla (x, y, w, h) del rostro detectado
+        margin_ratio: Ratio de margen alrededor del rostro (default 0.2 = 20%)
+        
+    Returns:
+        Coordenadas expandidas (x1, y1, x2, y2)
+    """
+    x, y, w, h = face_region
+    
+    # Calcular margen de seguridad
+    margin = int(w * margin_ratio)
+    x1 = max(0, x - margin)
+    y1 = max(0, y - margin)
+    x2 = min(frame_shape[1], x + w + margin)
+    y2 = min(frame_shape[0], y + h + margin)
+    
+    return x1, y1, x2, y2
+
+
 def preprocess_video_frame(
     frame: np.ndarray,
     face_region: Tuple[int, int, int, int],
@@ -50,14 +126,7 @@ def preprocess_video_frame(
     """
     import cv2
     
-    x, y, w, h = face_region
-    
-    # Calcular margen de seguridad
-    margin = int(w * margin_ratio)
-    x1 = max(0, x - margin)
-    y1 = max(0, y - margin)
-    x2 = min(frame.shape[1], x + w + margin)
-    y2 = min(frame.shape[0], y + h + margin)
+    x1, y1, x2, y2 = expand_face_region(frame.shape, face_region, margin_ratio)
     
     # Extraer ROI
     face_roi = frame[y1:y2, x1:x2]
@@ -6,16 +6,115 @@ Este módulo implementa la detección de voces generadas por IA
 (ElevenLabs, RVC, TTS, etc.) usando modelos de HuggingFace.
 """
 
+import hashlib
+import json
 import logging
+import os
+import tempfile
 from typing import Dict, Any, Optional
 
+import numpy as np
 import torch
 
 import config
 from core.processor import preprocess_audio
 
+try:
+    import librosa
+    from librosa.feature import (
+        melspectrogram as _melspectrogram,
+        mfcc as _mfcc,
+        spectral_centroid as _spectral_centroid,
+        spectral_contrast as _spectral_contrast,
+        spectral_rolloff as _spectral_rolloff,
+    )
+except ImportError:  # preprocess_audio informa la dependencia faltante al analizar
+    librosa = None
+
+try:
+    from numba import njit
+except ImportError:  # numba es opcional; se usa la versión numpy
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+# Subir al cambiar las heurísticas: invalida los resultados cacheados
+_FEATURE_CACHE_VERSION = 1
+
+
+def _zero_crossing_rate(y: np.ndarray, frame_length: int = 2048, hop_length: int = 512) -> np.ndarray:
+    """
+    Equivalente vectorizado de librosa.feature.zero_crossing_rate (center=True).
+    
+    Los cambios de signo entre muestras consecutivas se acumulan una sola
+    vez; el conteo de cada ventana (solapadas) es una resta de la suma
+    acumulada, sin materializar los frames.
+    
+    Returns:
+        Tasa de cruces por cero de cada frame
+    """
+    y = np.pad(y, frame_length // 2, mode="edge")
+    # Como librosa: |y| <= 1e-10 cuenta como cero y el cero es positivo
+    y = np.where(np.abs(y) <= 1e-10, 0, y)
+    sign = np.signbit(y)
+    crossings = np.concatenate(([0], np.cumsum(sign[1:] != sign[:-1])))
+    
+    starts = np.arange(0, len(y) - frame_length + 1, hop_length)
+    counts = crossings[starts + frame_length - 1] - crossings[starts]
+    return counts / frame_length
+
+
+def _spectral_stats_numpy(mfccs, zcr, contrast, rolloff, centroid):
+    """Versión numpy de _spectral_stats (una reducción por estadística)."""
+    return (
+        float(np.mean(np.std(mfccs, axis=1))),
+        float(np.std(zcr)),
+        float(np.mean(contrast)),
+        float(np.mean(rolloff)),
+        float(np.std(centroid)),
+    )
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _welford_std(x):
+        # Media y varianza en una sola pasada (estable numéricamente)
+        media = 0.0
+        m2 = 0.0
+        for i in range(x.shape[0]):
+            delta = x[i] - media
+            media += delta / (i + 1)
+            m2 += delta * (x[i] - media)
+        return np.sqrt(m2 / x.shape[0])
+
+    @njit(cache=True)
+    def _spectral_stats_numba(mfccs, zcr, contrast, rolloff, centroid):
+        uniformidad = 0.0
+        for k in range(mfccs.shape[0]):
+            uniformidad += _welford_std(mfccs[k])
+        return (
+            uniformidad / mfccs.shape[0],
+            _welford_std(zcr),
+            np.mean(contrast),
+            np.mean(rolloff),
+            _welford_std(centroid),
+        )
+else:
+    _spectral_stats_numba = None
+
+
+def _spectral_stats(mfccs, zcr, contrast, rolloff, centroid):
+    """
+    Estadísticas que usan las heurísticas, cada serie recorrida una sola vez.
+    
+    Returns:
+        (uniformidad MFCC = media de la std por coeficiente, std de ZCR,
+        media del contraste, media del rolloff, std del centroide)
+    """
+    if _spectral_stats_numba is not None:
+        return tuple(float(v) for v in _spectral_stats_numba(mfccs, zcr, contrast, rolloff, centroid))
+    return _spectral_stats_numpy(mfccs, zcr, contrast, rolloff, centroid)
+
 
 class AudioForensicsDetector:
     """
@@ -30,9 +129,23 @@ class AudioForensicsDetector:
 
     def __init__(self):
         self.device = torch.device(config.DEVICE)
+        self._warmup_stats()
         logger.info("🔊 AudioForensicsDetector inicializado (Modo Heurístico)")
         logger.info("   📊 Usando análisis espectral sin modelo pesado")
 
+    @staticmethod
+    def _warmup_stats():
+        """
+        Compila el kernel Numba con los dtypes que recibe en producción.
+        
+        MFCCs en float32; ZCR, contraste, rolloff y centroide en float64
+        (librosa los retorna así aunque la señal sea float32).
+        """
+        if _spectral_stats_numba is None:
+            return
+        f64 = np.ones((1, 4), dtype=np.float64)
+        _spectral_stats(np.ones((1, 4), dtype=np.float32), np.ones(4), f64, f64[0], f64[0])
+
     def _extract_spectral_features(self, audio_array, sr):
         """
         Extrae características espectrales del audio para detección heurística.
@@ -40,38 +153,35 @@ class AudioForensicsDetector:
         Returns:
             Dict con features y score de artificialidad (0-100)
         """
-        import librosa
-        import numpy as np
+        # Un solo STFT compartido por todas las features espectrales
+        # (mismos n_fft/hop que los valores por defecto de librosa)
+        magnitude = np.abs(librosa.stft(audio_array, n_fft=2048, hop_length=512))
+        mel_power = _melspectrogram(S=magnitude ** 2, sr=sr)
         
         # 1. MFCCs (Mel-frequency cepstral coefficients)
-        mfccs = librosa.feature.mfcc(y=audio_array, sr=sr, n_mfcc=13)
-        mfcc_mean = np.mean(mfccs, axis=1)
-        mfcc_std = np.std(mfccs, axis=1)
+        mfccs = _mfcc(S=librosa.power_to_db(mel_power), n_mfcc=13)
         
         # 2. Zero Crossing Rate (voces sintéticas tienden a tener patrones diferentes)
-        zcr = librosa.feature.zero_crossing_rate(audio_array)[0]
-        zcr_mean = np.mean(zcr)
-        zcr_std = np.std(zcr)
+        zcr = _zero_crossing_rate(audio_array)
         
         # 3. Spectral Contrast (diferencias entre picos y valles en espectro)
-        contrast = librosa.feature.spectral_contrast(y=audio_array, sr=sr)
-        contrast_mean = np.mean(contrast, axis=1)
+        contrast = _spectral_contrast(S=magnitude, sr=sr)
         
         # 4. Spectral Rolloff (frecuencia donde 85% de energía está debajo)
-        rolloff = librosa.feature.spectral_rolloff(y=audio_array, sr=sr)[0]
-        rolloff_mean = np.mean(rolloff)
+        rolloff = _spectral_rolloff(S=magnitude, sr=sr)[0]
         
         # 5. Spectral Centroid (centro de masa del espectro)
-        centroid = librosa.feature.spectral_centroid(y=audio_array, sr=sr)[0]
-        centroid_mean = np.mean(centroid)
-        centroid_std = np.std(centroid)
+        centroid = _spectral_centroid(S=magnitude, sr=sr)[0]
+        
+        mfcc_uniformity, zcr_std, contrast_score, rolloff_mean, centroid_std = _spectral_stats(
+            mfccs, zcr, contrast, rolloff, centroid
+        )
         
         # HEURÍSTICAS PARA DETECCIÓN
         synthetic_score = 0.0
         reasons = []
         
         # Heurística 1: MFCCs muy uniformes (TTS tiene menos variación natural)
-        mfcc_uniformity = np.mean(mfcc_std)
         if mfcc_uniformity < 15:  # Umbral empírico
             synthetic_score += 25
             reasons.append(f"MFCCs muy uniformes ({mfcc_uniformity:.1f})")
@@ -82,7 +192,6 @@ class AudioForensicsDetector:
             reasons.append(f"ZCR muy regular ({zcr_std:.3f})")
         
         # Heurística 3: Spectral contrast anormal (voces sintéticas tienen patrones diferentes)
-        contrast_score = np.mean(contrast_mean)
         if contrast_score > 30 or contrast_score < 15:
             synthetic_score += 20
             reasons.append(f"Contraste espectral anómalo ({contrast_score:.1f})")
@@ -109,6 +218,70 @@ class AudioForensicsDetector:
             }
         }
 
+    @staticmethod
+    def _cache_path(audio_path: str) -> Optional[str]:
+        """
+        Ruta del análisis cacheado para el contenido de un archivo.
+        
+        La clave es un BLAKE2b del contenido (las subidas llegan con nombres
+        y fechas nuevas) más los parámetros que cambian el resultado.
+        
+        Returns:
+            Ruta del JSON en MODEL_CACHE_DIR, o None si la caché está deshabilitada
+        """
+        if not config.AUDIO_FEATURE_CACHE:
+            return None
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{_FEATURE_CACHE_VERSION}:{config.AUDIO_SAMPLE_RATE}:{config.AUDIO_MAX_DURATION}:".encode())
+        with open(audio_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return str(config.MODEL_CACHE_DIR / "audio_features" / f"{h.hexdigest()}.json")
+
+    @staticmethod
+    def _load_cached(path: Optional[str]) -> Optional[Dict[str, Any]]:
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # mtime = último uso: la poda de _store_cached descarta las más antiguas
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _store_cached(path: Optional[str], entry: Dict[str, Any]) -> None:
+        """
+        Escribe la entrada de forma atómica (temporal + os.replace).
+        
+        Después poda el directorio a AUDIO_FEATURE_CACHE_MAX_ENTRIES,
+        borrando las entradas con el mtime (último uso) más antiguo.
+        """
+        if path is None:
+            return
+        directorio = os.path.dirname(path)
+        try:
+            os.makedirs(directorio, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar el análisis en caché: {e}")
+            return
+        
+        try:
+            entradas = [d for d in os.scandir(directorio) if d.name.endswith(".json")]
+            sobrantes = len(entradas) - config.AUDIO_FEATURE_CACHE_MAX_ENTRIES
+            if sobrantes > 0:
+                entradas.sort(key=lambda d: d.stat().st_mtime)
+                for entrada in entradas[:sobrantes]:
+                    os.remove(entrada.path)
+        except OSError as e:
+            logger.debug(f"No se pudo podar la caché de audio: {e}")
+
     def predict(self, audio_path: str) -> Dict[str, Any]:
         """
         Analiza un archivo de audio para detectar si es sintético usando análisis espectral.
@@ -122,19 +295,31 @@ class AudioForensicsDetector:
         logger.info(f"🔍 Iniciando análisis de audio: {audio_path}")
         
         try:
-            # Preprocesar audio
-            logger.info("   [1/2] Cargando y procesando audio...")
-            audio_array, sr = preprocess_audio(audio_path, target_sr=config.AUDIO_SAMPLE_RATE)
+            cache_path = self._cache_path(audio_path)
+            cached = self._load_cached(cache_path)
             
-            # Limitar duración si es necesario
-            max_samples = config.AUDIO_MAX_DURATION * sr
-            if len(audio_array) > max_samples:
-                logger.info(f"   ⚠️ Audio truncado a {config.AUDIO_MAX_DURATION}s")
-                audio_array = audio_array[:max_samples]
-            
-            # Extraer features espectrales y calcular score
-            logger.info("   [2/2] Analizando características espectrales...")
-            analysis = self._extract_spectral_features(audio_array, sr)
+            if cached is not None:
+                logger.info("   ♻️ Mismo audio analizado antes, se reutilizan sus features")
+                analysis = cached['analysis']
+                duration, sr = cached['duration'], cached['sample_rate']
+            else:
+                # Preprocesar audio
+                logger.info("   [1/2] Cargando y procesando audio...")
+                audio_array, sr = preprocess_audio(audio_path, target_sr=config.AUDIO_SAMPLE_RATE)
+                
+                # Limitar duración si es necesario
+                max_samples = config.AUDIO_MAX_DURATION * sr
+                if len(audio_array) > max_samples:
+                    logger.info(f"   ⚠️ Audio truncado a {config.AUDIO_MAX_DURATION}s")
+                    audio_array = audio_array[:max_samples]
+                
+                # Extraer features espectrales y calcular score
+                logger.info("   [2/2] Analizando características espectrales...")
+                analysis = self._extract_spectral_features(audio_array, sr)
+                duration = len(audio_array) / sr
+                self._store_cached(cache_path, {
+                    'analysis': analysis, 'duration': duration, 'sample_rate': sr
+                })
             
             fake_prob = analysis['synthetic_score']
             
@@ -154,7 +339,7 @@ class AudioForensicsDetector:
                 "score": fake_prob,
                 "verdict": verdict,
                 "confidence": confidence,
-                "duration_analyzed": len(audio_array) / sr,
+                "duration_analyzed": duration,
                 "sample_rate": sr,
                 "features": analysis['features'],
                 "detection_reasons": analysis['reasons']
@@ -21,10 +21,11 @@ Uso:
 """
 
 import logging
-from typing import Optional, Union
+from typing import List, Optional, Union
 from pathlib import Path
 
 import numpy as np
+import torch
 from PIL import Image
 
 from .schemas import ForensicResult, AnalysisContext
@@ -33,6 +34,7 @@ from .multilid_expert import MultiLIDExpert
 from .ufd_expert import UFDExpert
 from .semantic_expert import SemanticForensicsExpert
 from .fusion_engine import FusionEngine
+from .phash_cache import PerceptualCache, phash
 
 import config
 
@@ -101,6 +103,14 @@ class ImageForensicsDetector:
         self._semantic: Optional[SemanticForensicsExpert] = None
         self._fusion: Optional[FusionEngine] = None
         
+        # Caché perceptual de resultados de expertos
+        self._phash_cache: Optional[PerceptualCache] = None
+        if getattr(config, 'PHASH_CACHE_SIZE', 0) > 0:
+            self._phash_cache = PerceptualCache(
+                max_size=config.PHASH_CACHE_SIZE,
+                max_distance=getattr(config, 'PHASH_MAX_DISTANCE', 6),
+            )
+        
         self._initialized = False
         
         logger.info(f"🕵️ ImageForensicsDetector v3.0+ inicializado (device={self.device}, semantic={enable_semantic})")
@@ -191,13 +201,17 @@ class ImageForensicsDetector:
                 if image_input.shape[2] == 4:
                     # RGBA
                     return Image.fromarray(image_input[:, :, :3]).convert("RGB")
+                elif image_input.shape[2] == 3 and image_input.dtype == np.uint8:
+                    # RGB uint8: ya está en modo RGB, sin el convert() (una copia menos)
+                    return Image.fromarray(image_input)
                 else:
                     return Image.fromarray(image_input).convert("RGB")
             else:
                 raise ValueError(f"Numpy array con dimensiones no soportadas: {image_input.shape}")
         
         elif isinstance(image_input, Image.Image):
-            return image_input.convert("RGB")
+            # convert() siempre copia, incluso si ya está en RGB
+            return image_input if image_input.mode == "RGB" else image_input.convert("RGB")
         
         else:
             raise TypeError(f"Tipo de entrada no soportado: {type(image_input)}")
@@ -248,46 +262,88 @@ class ImageForensicsDetector:
             image = self._preprocess_input(image_input)
             logger.info(f"   Tamaño: {image.size}")
             
+            return self._run_experts(image)
+            
+        except Exception as e:
+            logger.error(f"❌ Error en análisis: {e}", exc_info=True)
+            return self._error_result(e)
+    
+    def _run_experts(
+        self, 
+        image: Image.Image, 
+        ufd_features: Optional[torch.Tensor] = None,
+        intermediate_features: Optional[List[torch.Tensor]] = None
+    ) -> ForensicResult:
+        """
+        Ejecuta los expertos sobre una imagen ya preprocesada y fusiona.
+        
+        multiLID y UFD comparten un único forward de CLIP: si no llegan
+        features precalculadas se extraen ambas en una sola pasada.
+        
+        Args:
+            image: PIL Image en modo RGB
+            ufd_features: Embedding CLIP precalculado para UFD (opcional)
+            intermediate_features: Features intermedias para multiLID (opcional)
+        """
+        # Imágenes casi idénticas reutilizan multiLID y UFD (los más costosos)
+        key = phash(image) if self._phash_cache is not None else None
+        cached = self._phash_cache.get(key) if key is not None else None
+        
+        if cached is not None:
+            multilid_result, ufd_result = cached
+            logger.info("♻️ multiLID/UFD reutilizados (pHash cercano en caché)")
+        else:
+            if ufd_features is None and intermediate_features is None:
+                try:
+                    ufd_features, intermediate_features = self._extractor.extract_all_features(image)
+                except Exception as e:
+                    logger.warning(f"⚠️ Forward compartido de CLIP falló, cada experto extrae el suyo: {e}")
+            
             # Análisis multiLID
             logger.info("🔬 Ejecutando análisis multiLID...")
-            multilid_result = self._multilid.analyze(image)
+            multilid_result = self._multilid.analyze(image, intermediate_features=intermediate_features)
             logger.info(f"   Score: {multilid_result.score:.2f}")
             
             # Análisis UFD
             logger.info("🎯 Ejecutando análisis UFD...")
-            ufd_result = self._ufd.analyze(image)
+            ufd_result = self._ufd.analyze(image, features=ufd_features)
             logger.info(f"   Score: {ufd_result.score:.2f}")
             
-            # Análisis Semantic (si está habilitado)
-            semantic_result = None
-            if self.enable_semantic and self._semantic:
-                logger.info("🧠 Ejecutando análisis Semantic...")
-                semantic_result = self._semantic.analyze(image)
-                logger.info(f"   Score: {semantic_result.score:.2f}")
-            
-            # Fusión de evidencias
-            logger.info("⚗️ Fusionando evidencias...")
-            result = self._fusion.fuse(multilid_result, ufd_result, semantic_result)
-            
-            logger.info("=" * 50)
-            logger.info(f"✅ ANÁLISIS COMPLETADO: {result.verdict}")
-            logger.info(f"   Confianza: {result.confidence}")
-            logger.info("=" * 50)
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Error en análisis: {e}", exc_info=True)
-            
-            # Retornar resultado de error estructurado
-            return ForensicResult(
-                verdict="ERROR",
-                confidence="N/A",
-                scores={"multiLID": 0.0, "UFD": 0.0, "Semantic": 0.0},
-                evidence=[f"⚠️ Error durante el análisis: {str(e)}"],
-                notes="El análisis no pudo completarse debido a un error. "
-                      "Verifique que la imagen sea válida y los modelos estén disponibles."
+            sin_errores = all(
+                "error" not in (r.raw_data or {}) for r in (multilid_result, ufd_result)
             )
+            if key is not None and sin_errores:
+                self._phash_cache.put(key, (multilid_result, ufd_result))
+        
+        # Análisis Semantic (si está habilitado)
+        semantic_result = None
+        if self.enable_semantic and self._semantic:
+            logger.info("🧠 Ejecutando análisis Semantic...")
+            semantic_result = self._semantic.analyze(image)
+            logger.info(f"   Score: {semantic_result.score:.2f}")
+        
+        # Fusión de evidencias
+        logger.info("⚗️ Fusionando evidencias...")
+        result = self._fusion.fuse(multilid_result, ufd_result, semantic_result)
+        
+        logger.info("=" * 50)
+        logger.info(f"✅ ANÁLISIS COMPLETADO: {result.verdict}")
+        logger.info(f"   Confianza: {result.confidence}")
+        logger.info("=" * 50)
+        
+        return result
+    
+    @staticmethod
+    def _error_result(error: Exception) -> ForensicResult:
+        """Construye un resultado de error estructurado."""
+        return ForensicResult(
+            verdict="ERROR",
+            confidence="N/A",
+            scores={"multiLID": 0.0, "UFD": 0.0, "Semantic": 0.0},
+            evidence=[f"⚠️ Error durante el análisis: {str(error)}"],
+            notes="El análisis no pudo completarse debido a un error. "
+                  "Verifique que la imagen sea válida y los modelos estén disponibles."
+        )
     
     def analyze_dict(
         self, 
@@ -307,6 +363,72 @@ class ImageForensicsDetector:
         result = self.analyze(image_input)
         return result.to_dict()
     
+    def analyze_batch(
+        self, 
+        image_inputs: List[Union[str, Path, np.ndarray, Image.Image]]
+    ) -> List[dict]:
+        """
+        Analiza varias imágenes compartiendo un único forward de CLIP para UFD.
+        
+        Usado por el micro-batcher de la interfaz cuando varias solicitudes
+        llegan a la vez. Cada imagen conserva su propio manejo de errores.
+        
+        Args:
+            image_inputs: Lista de imágenes a analizar
+            
+        Returns:
+            Lista de dicts (mismo orden que la entrada)
+        """
+        if not image_inputs:
+            return []
+        
+        if len(image_inputs) == 1:
+            return [self.analyze_dict(image_inputs[0])]
+        
+        logger.info(f"📦 Analizando lote de {len(image_inputs)} imágenes")
+        
+        try:
+            self._lazy_load()
+        except Exception as e:
+            logger.error(f"❌ Error inicializando detector: {e}", exc_info=True)
+            return [self._error_result(e).to_dict() for _ in image_inputs]
+        
+        images: List[Optional[Image.Image]] = []
+        results: List[Optional[dict]] = []
+        for image_input in image_inputs:
+            try:
+                images.append(self._preprocess_input(image_input))
+                results.append(None)
+            except Exception as e:
+                logger.error(f"❌ Error preprocesando imagen del lote: {e}")
+                images.append(None)
+                results.append(self._error_result(e).to_dict())
+        
+        # Un solo forward de CLIP (embedding + capas de multiLID) para todas las imágenes válidas
+        valid = [i for i, img in enumerate(images) if img is not None]
+        features = intermediate = None
+        try:
+            if valid:
+                features, intermediate = self._extractor.extract_all_features_batch(
+                    [images[i] for i in valid]
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Extracción en lote falló, se usa modo individual: {e}")
+        
+        for j, i in enumerate(valid):
+            try:
+                if features is not None:
+                    results[i] = self._run_experts(
+                        images[i], features[j:j + 1], [layer[j:j + 1] for layer in intermediate]
+                    ).to_dict()
+                else:
+                    results[i] = self._run_experts(images[i]).to_dict()
+            except Exception as e:
+                logger.error(f"❌ Error en análisis: {e}", exc_info=True)
+                results[i] = self._error_result(e).to_dict()
+        
+        return results
+    
     @property
     def is_initialized(self) -> bool:
         """Indica si el detector está completamente inicializado."""
@@ -11,7 +11,10 @@ Este módulo proporciona:
 - Caché de modelos para eficiencia
 """
 
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import List, Optional, Tuple, Dict
 from pathlib import Path
 
@@ -20,8 +23,22 @@ import torch.nn as nn
 from PIL import Image
 import numpy as np
 
+import config
+
 logger = logging.getLogger(__name__)
 
+# Buffer float32 por hilo para normalizar sin asignar memoria en cada imagen
+_tls = threading.local()
+
+
+def _norm_buf(shape: Tuple[int, ...]) -> np.ndarray:
+    """Retorna el buffer de normalización del hilo actual con la forma dada."""
+    buf = getattr(_tls, "buf", None)
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, dtype=np.float32)
+        _tls.buf = buf
+    return buf
+
 
 class CLIPFeatureExtractor:
     """
@@ -45,6 +62,9 @@ class CLIPFeatureExtractor:
     # Capas del ViT a extraer para multiLID
     INTERMEDIATE_LAYERS = [6, 8, 10, 11]
     
+    # Tensores preprocesados recientes (LRU por contenido de la imagen)
+    TENSOR_CACHE_SIZE = 32
+    
     def __init__(self, device: str = "cpu"):
         """
         Inicializa el extractor.
@@ -55,6 +75,16 @@ class CLIPFeatureExtractor:
         self.device = device
         self._model = None
         self._preprocess = None
+        # Ruta rápida: transformaciones PIL + normalización en buffer reutilizable
+        self._pil_transform = None
+        self._norm_mean: Optional[np.ndarray] = None
+        self._norm_std: Optional[np.ndarray] = None
+        self._tensor_cache: "OrderedDict[bytes, torch.Tensor]" = OrderedDict()
+        self._tensor_cache_lock = threading.Lock()
+        # Embeddings de texto normalizados por conjunto de prompts (son fijos por llamador)
+        self._text_cache: Dict[Tuple[str, ...], torch.Tensor] = {}
+        # Forward visual compilado (None = eager)
+        self._visual_fn = None
         self._loaded = False
         
         logger.info(f"🔧 CLIPFeatureExtractor inicializado (device={device})")
@@ -87,6 +117,8 @@ class CLIPFeatureExtractor:
                 jit=False  # Deshabilitamos JIT para acceder a intermedios
             )
             
+            self._setup_fast_preprocess()
+            
             # Modo evaluación
             self._model.eval()
             
@@ -94,6 +126,8 @@ class CLIPFeatureExtractor:
             for param in self._model.parameters():
                 param.requires_grad = False
             
+            self._compile_visual()
+            
             self._loaded = True
             
             print("✅ CLIP ViT-L/14 cargado exitosamente!\n")
@@ -109,6 +143,69 @@ class CLIPFeatureExtractor:
             logger.error(f"❌ Error cargando CLIP: {e}")
             raise
     
+    def _compile_visual(self) -> None:
+        """
+        Compila el forward visual completo con torch.compile (config.USE_TORCH_COMPILE).
+        
+        Se compila _forward_visual (todo el ViT, incluidas las capas
+        intermedias que usa multiLID) en el modo por defecto, sin CUDA
+        graphs: el extractor se llama desde varios hilos y las salidas de
+        un grafo se sobrescriben en la siguiente reproducción. Los forwards
+        de prueba con lote 1 y IMAGE_BATCH_MAX fuerzan la compilación con
+        lote dinámico; si fallan se conserva el modo eager.
+        """
+        if not (config.USE_TORCH_COMPILE and hasattr(torch, "compile")):
+            return
+        
+        try:
+            self._visual_fn = torch.compile(self._forward_visual, fullgraph=False)
+            side = self._model.visual.input_resolution
+            for n in sorted({1, max(1, config.IMAGE_BATCH_MAX)}):
+                self._forward_all(torch.zeros(n, 3, side, side, device=self.device))
+            logger.info("⚡ Forward visual de CLIP compilado con torch.compile")
+        except Exception as e:
+            logger.warning(f"⚠️ torch.compile no disponible para CLIP, se usa modo eager: {e}")
+            self._visual_fn = None
+    
+    def _setup_fast_preprocess(self) -> None:
+        """
+        Separa el preprocesador de CLIP en su parte PIL y su normalización.
+        
+        CLIP termina con ToTensor() + Normalize(); ambas se reemplazan por
+        operaciones numpy in-place sobre un buffer por hilo. Si el
+        preprocesador no tiene esa forma se mantiene el original.
+        """
+        from torchvision import transforms as T
+        
+        steps = getattr(self._preprocess, "transforms", None)
+        if (
+            not steps or len(steps) < 2
+            or not isinstance(steps[-2], T.ToTensor)
+            or not isinstance(steps[-1], T.Normalize)
+        ):
+            return
+        
+        self._pil_transform = T.Compose(steps[:-2])
+        self._norm_mean = np.asarray(steps[-1].mean, dtype=np.float32).reshape(-1, 1, 1)
+        self._norm_std = np.asarray(steps[-1].std, dtype=np.float32).reshape(-1, 1, 1)
+    
+    def _to_normalized_tensor(self, resized: Image.Image) -> torch.Tensor:
+        """
+        Equivalente a ToTensor() + Normalize() escribiendo en el buffer del hilo.
+        
+        Recibe la imagen ya pasada por _pil_transform (resize + crop).
+        
+        El tensor retornado comparte memoria con ese buffer: debe consumirse
+        (o copiarse, p. ej. con .to(device) o torch.cat) antes de la
+        siguiente llamada en el mismo hilo.
+        """
+        arr = np.asarray(resized)  # (H, W, C) uint8
+        buf = _norm_buf((arr.shape[2], arr.shape[0], arr.shape[1]))
+        np.divide(arr.transpose(2, 0, 1), 255.0, out=buf, casting="unsafe")
+        buf -= self._norm_mean
+        buf /= self._norm_std
+        return torch.from_numpy(buf)
+    
     def _ensure_loaded(self) -> None:
         """Asegura que el modelo esté cargado."""
         if not self._loaded:
@@ -132,15 +229,45 @@ class CLIPFeatureExtractor:
         elif isinstance(image_input, np.ndarray):
             image = Image.fromarray(image_input).convert("RGB")
         elif isinstance(image_input, Image.Image):
-            image = image_input.convert("RGB")
+            image = image_input if image_input.mode == "RGB" else image_input.convert("RGB")
         else:
             raise TypeError(f"Tipo de imagen no soportado: {type(image_input)}")
         
         # Aplicar preprocesamiento de CLIP
-        processed = self._preprocess(image).unsqueeze(0).to(self.device)
+        key = None
+        if self._pil_transform is not None:
+            # multiLID y UFD preprocesan la misma imagen: reutilizar el tensor.
+            # La clave se calcula sobre la entrada ya reducida (224px), no
+            # sobre la imagen a resolución completa
+            resized = self._pil_transform(image)
+            key = self._tensor_cache_key(resized)
+            with self._tensor_cache_lock:
+                cached = self._tensor_cache.get(key)
+                if cached is not None:
+                    self._tensor_cache.move_to_end(key)
+                    return cached
+            processed = self._to_normalized_tensor(resized)
+        else:
+            processed = self._preprocess(image)
+        # clone(): el tensor normalizado comparte el buffer del hilo
+        processed = processed.unsqueeze(0).to(self.device).clone()
+        
+        if key is not None:
+            with self._tensor_cache_lock:
+                self._tensor_cache[key] = processed
+                while len(self._tensor_cache) > self.TENSOR_CACHE_SIZE:
+                    self._tensor_cache.popitem(last=False)
         
         return processed
     
+    @staticmethod
+    def _tensor_cache_key(image: Image.Image) -> bytes:
+        """Digest del contenido de una imagen PIL (incluye modo y tamaño)."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{image.mode}{image.size}".encode())
+        h.update(image.tobytes())
+        return h.digest()
+    
     def extract_features(self, image_input) -> torch.Tensor:
         """
         Extrae el embedding final de CLIP para una imagen.
@@ -168,6 +295,49 @@ class CLIPFeatureExtractor:
         logger.debug(f"Features extraídas: shape={features.shape}")
         return features
     
+    def extract_features_batch(self, images: List) -> torch.Tensor:
+        """
+        Extrae embeddings finales de CLIP para varias imágenes en un solo forward.
+        
+        Args:
+            images: Lista de PIL.Image, numpy arrays o paths
+            
+        Returns:
+            Tensor de shape (N, 768) con embeddings normalizados
+        """
+        self._ensure_loaded()
+        
+        batch = self._stack_batch(images)
+        
+        with torch.no_grad():
+            features = self._model.encode_image(batch)
+            features = features / features.norm(dim=-1, keepdim=True)
+        
+        logger.debug(f"Features en lote extraídas: shape={features.shape}")
+        return features
+    
+    def _encode_prompts(self, prompts: Tuple[str, ...]) -> torch.Tensor:
+        """
+        Embeddings de texto normalizados, codificados una sola vez por conjunto de prompts.
+        
+        Los prompts de un experto no cambian entre imágenes: tokenizar y
+        pasar el text encoder en cada llamada repetía el mismo cálculo.
+        """
+        cached = self._text_cache.get(prompts)
+        if cached is not None:
+            return cached
+        
+        import clip
+        
+        with torch.no_grad():
+            text_tokens = clip.tokenize(list(prompts)).to(self.device)
+            text_features = self._model.encode_text(text_tokens)
+            text_features = text_features / text_features.norm(dim=-1, keepdim=True)
+        
+        # Asignación atómica en dict: dos hilos a lo sumo codifican lo mismo una vez
+        self._text_cache[prompts] = text_features
+        return text_features
+    
     def calculate_probabilities(self, image_features: torch.Tensor, text_prompts: List[str]) -> Dict[str, float]:
         """
         Calcula la probabilidad de que la imagen coincida con cada prompt.
@@ -180,16 +350,11 @@ class CLIPFeatureExtractor:
             Diccionario {prompt: probabilidad}
         """
         self._ensure_loaded()
-        import clip
+        text_features = self._encode_prompts(tuple(text_prompts))
         
         with torch.no_grad():
-            # Tokenizar y codificar textos
-            text_tokens = clip.tokenize(text_prompts).to(self.device)
-            text_features = self._model.encode_text(text_tokens)
-            
             # Normalizar
             image_features = image_features / image_features.norm(dim=-1, keepdim=True)
-            text_features = text_features / text_features.norm(dim=-1, keepdim=True)
             
             # Calcular similitud (cosine similarity)
             # Logit scale es aprendido por CLIP para escalar los productos punto
@@ -217,49 +382,106 @@ class CLIPFeatureExtractor:
         Returns:
             Lista de tensores, uno por cada capa en INTERMEDIATE_LAYERS
         """
+        return self.extract_all_features(image_input)[1]
+    
+    def extract_all_features(self, image_input) -> Tuple[torch.Tensor, List[torch.Tensor]]:
+        """
+        Embedding final (UFD) y features intermedias (multiLID) en un solo forward.
+        
+        Evita recorrer dos veces el ViT-L/14 cuando se ejecutan ambos expertos
+        sobre la misma imagen.
+        
+        Args:
+            image_input: PIL.Image, numpy array, o path a archivo
+            
+        Returns:
+            (features normalizadas (1, 768), lista de features intermedias)
+        """
         self._ensure_loaded()
         
         # Preprocesar imagen
         image_tensor = self.preprocess_image(image_input)
         
-        intermediate_features = []
+        features, intermediate_features = self._forward_all(image_tensor)
+        logger.debug(f"Features intermedias extraídas: {len(intermediate_features)} capas")
+        return features, intermediate_features
+    
+    def extract_all_features_batch(self, images: List) -> Tuple[torch.Tensor, List[torch.Tensor]]:
+        """
+        Versión en lote de extract_all_features (un forward para N imágenes).
         
-        with torch.no_grad():
-            # Acceder al visual transformer
-            visual = self._model.visual
-            
-            # Patch embedding + position embedding
-            x = visual.conv1(image_tensor.type(visual.conv1.weight.dtype))
-            x = x.reshape(x.shape[0], x.shape[1], -1)  # (batch, hidden, grid**2)
-            x = x.permute(0, 2, 1)  # (batch, grid**2, hidden)
-            
-            # Agregar class token
-            x = torch.cat([
-                visual.class_embedding.to(x.dtype) + 
-                torch.zeros(x.shape[0], 1, x.shape[-1], dtype=x.dtype, device=x.device),
-                x
-            ], dim=1)
-            
-            # Agregar position embedding
-            x = x + visual.positional_embedding.to(x.dtype)
-            
-            # Pre-LN
-            x = visual.ln_pre(x)
+        Args:
+            images: Lista de PIL.Image, numpy arrays o paths
             
-            # Permutar para transformer: (seq_len, batch, hidden)
-            x = x.permute(1, 0, 2)
+        Returns:
+            (features normalizadas (N, 768), lista de features intermedias (N, hidden))
+        """
+        self._ensure_loaded()
+        
+        batch = self._stack_batch(images)
+        
+        return self._forward_all(batch)
+    
+    def _stack_batch(self, images: List) -> torch.Tensor:
+        """Preprocesa las imágenes y copia cada una a su fila del lote."""
+        batch = None
+        for j, img in enumerate(images):
+            tensor = self.preprocess_image(img)
+            if batch is None:
+                batch = tensor.new_empty((len(images),) + tuple(tensor.shape[1:]))
+            batch[j:j + 1].copy_(tensor)
+        return batch
+    
+    def _forward_all(self, image_tensor: torch.Tensor) -> Tuple[torch.Tensor, List[torch.Tensor]]:
+        """Ejecuta el forward visual (compilado si está disponible) sin gradientes."""
+        forward = self._visual_fn or self._forward_visual
+        with torch.no_grad():
+            return forward(image_tensor)
+    
+    def _forward_visual(self, image_tensor: torch.Tensor) -> Tuple[torch.Tensor, List[torch.Tensor]]:
+        """Recorre el ViT guardando el class token de INTERMEDIATE_LAYERS y el embedding final."""
+        intermediate_features = []
+        
+        # Acceder al visual transformer
+        visual = self._model.visual
+        
+        # Patch embedding + position embedding
+        x = visual.conv1(image_tensor.type(visual.conv1.weight.dtype))
+        x = x.reshape(x.shape[0], x.shape[1], -1)  # (batch, hidden, grid**2)
+        x = x.permute(0, 2, 1)  # (batch, grid**2, hidden)
+        
+        # Agregar class token
+        x = torch.cat([
+            visual.class_embedding.to(x.dtype) + 
+            torch.zeros(x.shape[0], 1, x.shape[-1], dtype=x.dtype, device=x.device),
+            x
+        ], dim=1)
+        
+        # Agregar position embedding
+        x = x + visual.positional_embedding.to(x.dtype)
+        
+        # Pre-LN
+        x = visual.ln_pre(x)
+        
+        # Permutar para transformer: (seq_len, batch, hidden)
+        x = x.permute(1, 0, 2)
+        
+        # Pasar por cada bloque del transformer y guardar intermedios
+        for i, block in enumerate(visual.transformer.resblocks):
+            x = block(x)
             
-            # Pasar por cada bloque del transformer y guardar intermedios
-            for i, block in enumerate(visual.transformer.resblocks):
-                x = block(x)
-                
-                if i in self.INTERMEDIATE_LAYERS:
-                    # Guardar features de esta capa (solo class token)
-                    layer_features = x[0, :, :]  # (batch, hidden)
-                    intermediate_features.append(layer_features.clone())
+            if i in self.INTERMEDIATE_LAYERS:
+                # Guardar features de esta capa (solo class token)
+                layer_features = x[0, :, :]  # (batch, hidden)
+                intermediate_features.append(layer_features.clone())
         
-        logger.debug(f"Features intermedias extraídas: {len(intermediate_features)} capas")
-        return intermediate_features
+        # Cabeza de CLIP (igual que encode_image): LN del class token + proyección
+        features = visual.ln_post(x[0, :, :])
+        if visual.proj is not None:
+            features = features @ visual.proj
+        features = features / features.norm(dim=-1, keepdim=True)
+        
+        return features, intermediate_features
     
     def get_feature_dim(self) -> int:
         """
@@ -227,7 +227,7 @@ class MultiLIDExpert:
         
         return lid_value, z_score, desc
     
-    def analyze(self, image_input) -> ExpertResult:
+    def analyze(self, image_input, intermediate_features: Optional[List[torch.Tensor]] = None) -> ExpertResult:
         """
         Analiza una imagen usando multiLID.
         
@@ -239,6 +239,8 @@ class MultiLIDExpert:
         
         Args:
             image_input: PIL.Image, numpy array, o path a archivo
+            intermediate_features: Features intermedias ya calculadas
+                (p. ej. con extract_all_features)
             
         Returns:
             ExpertResult con score, confianza y evidencia técnica
@@ -247,7 +249,8 @@ class MultiLIDExpert:
         
         try:
             # Extraer features intermedias
-            intermediate_features = self.extractor.extract_intermediate_features(image_input)
+            if intermediate_features is None:
+                intermediate_features = self.extractor.extract_intermediate_features(image_input)
             
             # Analizar cada capa
             lid_values = []
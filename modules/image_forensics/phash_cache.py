@@ -0,0 +1,79 @@
+"""
+Perceptual Hash Cache - Reutilización de resultados para imágenes casi idénticas.
+
+UIDE Forense AI v3.0+
+Clean Architecture - Capa de Infraestructura
+
+Las imágenes generadas suelen re-publicarse recortadas, re-escaladas o
+re-comprimidas. Un hash perceptual (pHash, DCT 8x8 → 64 bits) permite
+reconocerlas con una distancia de Hamming pequeña y reutilizar los
+resultados de los expertos costosos (multiLID, UFD).
+"""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+def phash(image: Image.Image) -> int:
+    """
+    Calcula el pHash de 64 bits de una imagen.
+
+    Escala de grises 32x32 → DCT 2D → bloque 8x8 de baja frecuencia;
+    cada bit indica si el coeficiente supera la mediana del bloque.
+
+    Args:
+        image: PIL Image (cualquier modo)
+
+    Returns:
+        Entero de 64 bits
+    """
+    gray = np.asarray(image.convert("L"), dtype=np.float32)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small)[:8, :8]
+    bits = (low > np.median(low)).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class PerceptualCache:
+    """
+    Caché acotada indexada por pHash con búsqueda por distancia de Hamming.
+
+    Attributes:
+        max_size: Número máximo de entradas (se descartan las más antiguas)
+        max_distance: Distancia de Hamming máxima para considerar un acierto
+    """
+
+    def __init__(self, max_size: int = 256, max_distance: int = 6):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self._entries: Deque[Tuple[int, Any]] = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+
+    def get(self, key: int) -> Optional[Any]:
+        """Retorna el valor de la entrada más cercana dentro de `max_distance`."""
+        best, best_dist = None, self.max_distance + 1
+        with self._lock:
+            for k, value in self._entries:
+                dist = (k ^ key).bit_count()
+                if dist < best_dist:
+                    best, best_dist = value, dist
+                    if dist == 0:
+                        break
+        return best
+
+    def put(self, key: int, value: Any) -> None:
+        """Agrega una entrada (descarta la más antigua si está llena)."""
+        with self._lock:
+            self._entries.append((key, value))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -256,16 +256,20 @@ class UFDExpert:
         
         return float(np.clip(confidence, 0.1, 0.95))
     
-    def analyze(self, image_input) -> ExpertResult:
+    def analyze(self, image_input, features: Optional[torch.Tensor] = None) -> ExpertResult:
         """
         Analiza una imagen usando el clasificador UFD.
         
         Pipeline:
-        1. Extrae features de CLIP
+        1. Extrae features de CLIP (o usa las precalculadas)
         2. Pasa por clasificador lineal
         3. Aplica temperatura para calibración
         4. Genera evidencia forense
         
+        Args:
+            image_input: Imagen a analizar
+            features: Embedding CLIP (1, 768) ya calculado, p. ej. en un lote
+        
         Returns:
             ExpertResult con score calibrado
         """
@@ -275,7 +279,8 @@ class UFDExpert:
             self._init_classifier()
             
             # Extraer features
-            features = self.extractor.extract_features(image_input)
+            if features is None:
+                features = self.extractor.extract_features(image_input)
             
             # Asegurar compatibilidad de tipos (CLIP suele ser float16 en GPU)
             features = features.float()
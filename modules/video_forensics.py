@@ -7,18 +7,76 @@ XceptionNet pre-entrenado en FaceForensics++.
 """
 
 import logging
-from typing import Dict, Any, List, Tuple, Optional
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Tuple, Optional
 import cv2
+import numpy as np
 from PIL import Image
 
 import torch
 
 import config
 from core.model_manager import get_model_manager
-from core.processor import preprocess_video_frame
+from core.processor import expand_face_region
 
 logger = logging.getLogger(__name__)
 
+# Predicciones por frame: (índice de frame, probabilidad de fake 0-100)
+PREDICCION_DTYPE = np.dtype([("idx", np.int32), ("prob", np.float32)])
+
+
+class AdaptiveSampler:
+    """
+    Controlador de stride adaptativo para el muestreo de frames.
+    
+    Si los últimos scores son estables (desviación estándar baja) duplica
+    el stride para saltar segmentos homogéneos; si la variación aumenta
+    lo reduce a la mitad, sin bajar del stride base.
+    
+    Args:
+        base_stride: Stride mínimo (y el inicial)
+        max_stride: Stride máximo permitido
+        std_threshold: Desviación (escala 0-100) bajo la cual se considera estable
+        window: Número de scores recientes evaluados
+    """
+
+    def __init__(self, base_stride: int, max_stride: int,
+                 std_threshold: float = 2.0, window: int = 8):
+        self.base_stride = base_stride
+        self.max_stride = max(max_stride, base_stride)
+        self.std_threshold = std_threshold
+        self.stride = base_stride
+        self.last_k: deque = deque(maxlen=window)
+
+    def update(self, score: float) -> int:
+        """Registra un score y retorna el stride para el siguiente salto."""
+        self.last_k.append(score)
+        if len(self.last_k) < self.last_k.maxlen // 2:
+            return self.stride
+        
+        if np.std(self.last_k) < self.std_threshold:
+            self.stride = min(self.stride * 2, self.max_stride)
+        else:
+            self.stride = max(self.stride // 2, self.base_stride)
+        return self.stride
+
+
+class _SeguimientoRostro:
+    """
+    Estado del tracker KCF de un único análisis de video.
+    
+    Vive en predict_stream (no en el detector compartido), de modo que
+    análisis concurrentes no se pisan el tracker entre sí.
+    """
+
+    __slots__ = ("tracker", "frames")
+
+    def __init__(self):
+        self.tracker = None
+        self.frames = 0
+
 
 class VideoForensicsDetector:
     """
@@ -31,72 +89,307 @@ class VideoForensicsDetector:
     def __init__(self):
         self.model_manager = get_model_manager()
         self.face_cascade = None
+        self.face_detector = None  # YuNet (cv2.FaceDetectorYN) si está disponible
+        # setInputSize muta el detector: cada hilo usa su propia instancia YuNet
+        self._yunet_local = threading.local()
         
         logger.info("🎥 VideoForensicsDetector inicializado")
 
     def _cargar_detector_rostros(self):
-        """Carga el detector de rostros Haar Cascade."""
+        """
+        Carga el detector de rostros.
+        
+        Usa YuNet (red convolucional ONNX, más rápida y precisa) si el
+        modelo existe en config.YUNET_MODEL_PATH; si no, Haar Cascade.
+        """
+        if self.face_detector is not None:
+            return self.face_detector
+        
         if self.face_cascade is None:
+            yunet_path = Path(config.YUNET_MODEL_PATH)
+            if yunet_path.exists() and hasattr(cv2, "FaceDetectorYN"):
+                try:
+                    self.face_detector = self._crear_yunet()
+                    self._yunet_local.detector = self.face_detector
+                    logger.info("👤 Detector de rostros YuNet cargado")
+                    return self.face_detector
+                except cv2.error as e:
+                    logger.warning(f"⚠️ No se pudo cargar YuNet, se usa Haar Cascade: {e}")
+            
             cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
             self.face_cascade = cv2.CascadeClassifier(cascade_path)
             logger.info("👤 Detector de rostros cargado")
         return self.face_cascade
 
-    def _analizar_frame(self, frame: any, face_region: Tuple[int, int, int, int]) -> float:
+    @staticmethod
+    def _crear_yunet() -> Any:
+        """Crea una instancia YuNet a partir de config.YUNET_MODEL_PATH."""
+        return cv2.FaceDetectorYN.create(
+            str(config.YUNET_MODEL_PATH), "", (320, 320),
+            score_threshold=config.YUNET_SCORE_THRESHOLD,
+        )
+
+    def _yunet_del_hilo(self) -> Any:
+        """Retorna la instancia YuNet del hilo actual (la crea en el primer uso)."""
+        detector = getattr(self._yunet_local, "detector", None)
+        if detector is None:
+            detector = self._crear_yunet()
+            self._yunet_local.detector = detector
+        return detector
+
+    def _detectar_rostro(self, frame: Any,
+                         seguimiento: Optional[_SeguimientoRostro] = None) -> Optional[Tuple[int, int, int, int]]:
         """
-        Analiza un rostro extraído de un frame.
+        Detecta el rostro principal de un frame.
+        
+        La detección se hace sobre una copia reducida a FACE_DETECT_WIDTH
+        píxeles de ancho; la caja se re-escala a coordenadas del frame
+        original para recortar el rostro a resolución completa.
         
         Args:
             frame: Frame de video (BGR)
-            face_region: Tupla (x, y, w, h) del rostro
+            seguimiento: Estado del tracker del video en curso; sin él se
+                detecta en cada frame
             
         Returns:
-            Probabilidad de ser deepfake (0-100)
+            Tupla (x, y, w, h) del rostro, o None si no hay rostros
+        """
+        ancho = frame.shape[1]
+        escala = config.FACE_DETECT_WIDTH / ancho if ancho > config.FACE_DETECT_WIDTH else 1.0
+        small = frame
+        if escala < 1.0:
+            small = cv2.resize(frame, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+        
+        caja = self._seguir_rostro(seguimiento, small) if seguimiento is not None else None
+        if caja is None:
+            caja = self._detectar_en(small)
+            if caja is None:
+                return None
+            if seguimiento is not None:
+                self._iniciar_tracker(seguimiento, small, caja)
+        
+        x, y, w, h = caja
+        inv = 1.0 / escala
+        return max(0, int(x * inv)), max(0, int(y * inv)), int(w * inv), int(h * inv)
+
+    def _detectar_en(self, small: Any) -> Optional[Tuple[int, int, int, int]]:
+        """Ejecuta el detector de rostros sobre el frame reducido."""
+        if self.face_detector is not None:
+            # YuNet trabaja directamente sobre BGR; fila = [x, y, w, h, ..., score]
+            yunet = self._yunet_del_hilo()
+            yunet.setInputSize((small.shape[1], small.shape[0]))
+            _, faces = yunet.detect(small)
+            if faces is None or len(faces) == 0:
+                return None
+            x, y, w, h = faces[faces[:, -1].argmax(), :4]
+        else:
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+            if len(faces) == 0:
+                return None
+            x, y, w, h = faces[0]
+        return int(x), int(y), int(w), int(h)
+
+    @staticmethod
+    def _crear_tracker() -> Optional[Any]:
+        """Crea un tracker KCF (opencv-contrib); None si no está disponible."""
+        for modulo in (cv2, getattr(cv2, "legacy", None)):
+            crear = getattr(modulo, "TrackerKCF_create", None)
+            if crear is not None:
+                return crear()
+        return None
+
+    def _iniciar_tracker(self, seguimiento: _SeguimientoRostro, small: Any,
+                         caja: Tuple[int, int, int, int]) -> None:
+        """Inicializa el seguimiento a partir de una detección."""
+        seguimiento.tracker = None
+        if not config.FACE_TRACKING or config.FACE_REDETECT_EVERY <= 1:
+            return
+        
+        tracker = self._crear_tracker()
+        if tracker is None:
+            return
+        try:
+            tracker.init(small, tuple(int(v) for v in caja))
+        except cv2.error as e:
+            logger.debug(f"No se pudo iniciar el tracker: {e}")
+            return
+        seguimiento.tracker = tracker
+        seguimiento.frames = 0
+
+    def _seguir_rostro(self, seguimiento: _SeguimientoRostro, small: Any) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Actualiza el tracker y retorna la caja seguida.
+        
+        Retorna None (y descarta el tracker) si pierde el rostro o si ya
+        siguió FACE_REDETECT_EVERY frames, para acotar la deriva.
+        """
+        if seguimiento.tracker is None:
+            return None
+        
+        seguimiento.frames += 1
+        if seguimiento.frames >= config.FACE_REDETECT_EVERY:
+            seguimiento.tracker = None
+            return None
+        
+        try:
+            ok, (x, y, w, h) = seguimiento.tracker.update(small)
+        except cv2.error:
+            ok = False
+        if not ok or w <= 0 or h <= 0:
+            seguimiento.tracker = None
+            return None
+        return int(x), int(y), int(w), int(h)
+
+    def warmup(self) -> None:
+        """
+        Precarga el detector de rostros y XceptionNet con una pasada en vacío.
+
+        Un video sintético sin rostros nunca llega al modelo, por lo que el
+        precalentamiento se hace directamente con un tensor de ceros.
+        """
+        self._cargar_detector_rostros()
+        modelo = self.model_manager.cargar_modelo_video()
+        if modelo is None:
+            return
+
+        dummy = self.model_manager.preparar_entrada(
+            torch.zeros(1, 3, config.VIDEO_SIZE, config.VIDEO_SIZE)
+        )
+        with torch.inference_mode(), self.model_manager.autocast():
+            modelo(dummy)
+        logger.info("🔥 Modelo de video precalentado")
+
+    def _preparar_rostro(self, frame: Any, face_region: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Recorta un rostro (con margen) del frame, sin convertirlo.
+        
+        La conversión BGR→RGB, el redimensionado y la normalización se
+        hacen por lote en el dispositivo (ModelManager.preprocesar_rostros).
+        
+        Args:
+            frame: Frame de video (BGR)
+            face_region: Tupla (x, y, w, h) del rostro
+        """
+        x1, y1, x2, y2 = expand_face_region(frame.shape, face_region)
+        return frame[y1:y2, x1:x2]
+
+    def _lanzar_lote(self, rostros: List[np.ndarray]) -> Optional[torch.Tensor]:
+        """
+        Lanza la inferencia de un lote sin esperar su resultado.
+        
+        En CUDA la copia host→device (en uint8), el preprocesado y el forward
+        se encolan en un stream dedicado, de modo que la CPU puede seguir
+        decodificando frames mientras la GPU trabaja.
+        
+        Returns:
+            Tensor de probabilidades (0-100) aún en el dispositivo, o None
+            si no hay modelo o la inferencia falló
         """
         modelo = self.model_manager.cargar_modelo_video()
         
         if modelo is None:
-            return 50.0  # Valor neutro si no hay modelo
+            return None
         
         try:
-            # Preprocesar frame
-            face_pil, _ = preprocess_video_frame(frame, face_region)
+            stream = self.model_manager.get_stream()
+            if stream is None:
+                lote = self.model_manager.preparar_entrada(
+                    self.model_manager.preprocesar_rostros(rostros)
+                )
+                with torch.inference_mode(), self.model_manager.autocast():
+                    output = modelo(lote)
+                    return torch.softmax(output.float(), dim=1)[:, 1].mul_(100)
             
-            # Aplicar transformaciones
-            face_tensor = self.model_manager.transform_video(face_pil).unsqueeze(0)
-            face_tensor = face_tensor.to(self.model_manager.get_dispositivo())
+            with torch.cuda.stream(stream):
+                lote = self.model_manager.preparar_entrada(
+                    self.model_manager.preprocesar_rostros(rostros)
+                )
+                with torch.inference_mode(), self.model_manager.autocast():
+                    output = modelo(lote)
+                    return torch.softmax(output.float(), dim=1)[:, 1].mul_(100)
             
-            with torch.no_grad():
-                output = modelo(face_tensor)
-                prob_fake = torch.softmax(output, dim=1)[0][1].item() * 100
-                
-            return prob_fake
+        except Exception as e:
+            logger.error(f"Error analizando lote de frames: {e}")
+            return None
+
+    def _recoger_lote(self, probs: Optional[torch.Tensor], n: int) -> List[float]:
+        """
+        Espera y retorna el resultado de un lote lanzado con _lanzar_lote.
+        
+        Args:
+            probs: Valor retornado por _lanzar_lote
+            n: Tamaño del lote (para el valor neutro si falló)
+        """
+        if probs is None:
+            return [50.0] * n  # Valor neutro si no hay modelo o hubo error
+        
+        try:
+            stream = self.model_manager.get_stream()
+            if stream is not None:
+                stream.synchronize()
+            return probs.cpu().tolist()
+        except Exception as e:
+            logger.error(f"Error analizando lote de frames: {e}")
+            return [50.0] * n
+
+    def _inferir_lote(self, rostros: List[np.ndarray]) -> List[float]:
+        """
+        Clasifica un lote de rostros con un único forward de XceptionNet.
+        
+        Args:
+            rostros: Lista de recortes BGR de _preparar_rostro
             
+        Returns:
+            Probabilidades de deepfake (0-100), en el mismo orden
+        """
+        return self._recoger_lote(self._lanzar_lote(rostros), len(rostros))
+
+    def _analizar_frame(self, frame: Any, face_region: Tuple[int, int, int, int]) -> float:
+        """
+        Analiza un rostro extraído de un frame.
+        
+        Args:
+            frame: Frame de video (BGR)
+            face_region: Tupla (x, y, w, h) del rostro
+            
+        Returns:
+            Probabilidad de ser deepfake (0-100)
+        """
+        try:
+            return self._inferir_lote([self._preparar_rostro(frame, face_region)])[0]
         except Exception as e:
             logger.error(f"Error analizando frame: {e}")
             return 50.0
 
-    def predict(self, video_path: str) -> Dict[str, Any]:
+    def predict_stream(self, video_path: str, progress=None,
+                       cancelar: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
         """
-        Analiza un video para detectar deepfakes.
+        Analiza un video emitiendo resultados parciales.
         
         Args:
             video_path: Ruta al archivo de video
+            progress: Callback opcional de progreso (p. ej. gr.Progress)
+            cancelar: Evento propio de esta llamada; el bucle de frames lo
+                consulta en cada iteración y, si está activo, finaliza con
+                las predicciones acumuladas hasta ese momento
             
-        Returns:
-            Diccionario con resultado del análisis
+        Yields:
+            Dicts con "status":
+            - "progress": mensaje y "running_scores" acumulados
+            - "complete": resultado final del análisis
+            - "error": mensaje de error
         """
         logger.info(f"🎬 Iniciando análisis de video: {video_path}")
+        if cancelar is None:
+            cancelar = threading.Event()
         
         try:
             # Abrir video
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
-                return {
-                    "error": "Error abriendo video",
-                    "is_deepfake": False,
-                    "probability": 0.0
-                }
+                yield {"status": "error", "message": "Error abriendo video"}
+                return
             
             # Metadatos
             frames_totales = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -106,70 +399,150 @@ class VideoForensicsDetector:
             # Validar duración
             if duracion > config.MAX_VIDEO_DURATION_SECONDS:
                 cap.release()
-                return {
-                    "error": f"Video demasiado largo ({duracion:.1f}s). Máximo: {config.MAX_VIDEO_DURATION_SECONDS}s",
-                    "is_deepfake": False,
-                    "probability": 0.0
+                yield {
+                    "status": "error",
+                    "message": f"Video demasiado largo ({duracion:.1f}s). Máximo: {config.MAX_VIDEO_DURATION_SECONDS}s",
                 }
+                return
             
             # Cargar detector de rostros
-            face_cascade = self._cargar_detector_rostros()
-            
-            # Variables de seguimiento
-            predicciones: List[Tuple[int, float]] = []
-            frames_con_rostro = 0
-            max_fake_prob = 0.0
+            self._cargar_detector_rostros()
             
             # Configurar stride
             stride = config.VIDEO_FRAME_STRIDE
             if duracion > 60:
                 stride = 60
             
+            # Variables de seguimiento. El stride solo crece (muestreo
+            # adaptativo), así que ceil(frames/stride) acota las predicciones;
+            # CAP_PROP_FRAME_COUNT es una estimación, por eso se permite crecer.
+            predicciones = np.empty(max(1, -(-frames_totales // stride)), dtype=PREDICCION_DTYPE)
+            n_pred = 0
+            frames_con_rostro = 0
+            early_exit = False
+            # Tracker KCF propio de este video
+            seguimiento = _SeguimientoRostro()
+            
+            # Rostros pendientes de inferencia: (índice de frame, recorte)
+            pendientes: List[Tuple[int, np.ndarray]] = []
+            batch_size = max(1, config.VIDEO_BATCH_SIZE)
+            # Lotes lanzados cuyo resultado aún no se leyó: (índices, probs)
+            en_vuelo: deque = deque()
+            
+            def _lanzar_pendientes() -> None:
+                """Lanza el lote pendiente sin esperar el resultado."""
+                indices = [idx for idx, _ in pendientes]
+                en_vuelo.append((indices, self._lanzar_lote([t for _, t in pendientes])))
+                pendientes.clear()
+            
+            def _registrar(idx: int, prob_fake: float) -> None:
+                """Escribe una predicción en el array preasignado."""
+                nonlocal predicciones, n_pred
+                if n_pred == len(predicciones):
+                    predicciones = np.resize(predicciones, 2 * len(predicciones))
+                predicciones[n_pred] = (idx, prob_fake)
+                n_pred += 1
+            
+            def _recoger_en_vuelo(max_en_vuelo: int) -> List[Dict[str, Any]]:
+                """Lee lotes terminados hasta dejar `max_en_vuelo` y retorna eventos."""
+                eventos = []
+                while len(en_vuelo) > max_en_vuelo:
+                    indices, lanzado = en_vuelo.popleft()
+                    probs = self._recoger_lote(lanzado, len(indices))
+                    for idx, prob_fake in zip(indices, probs):
+                        _registrar(idx, prob_fake)
+                        if sampler is not None:
+                            sampler.update(prob_fake)
+                        eventos.append({
+                            "status": "progress",
+                            "message": f"🔎 Frame {idx}/{frames_totales}: {prob_fake:.1f}% fake",
+                            "running_scores": predicciones["prob"][:n_pred],
+                        })
+                return eventos
+            
+            sampler = None
+            if config.VIDEO_ADAPTIVE_SAMPLING:
+                sampler = AdaptiveSampler(
+                    base_stride=stride,
+                    max_stride=stride * config.VIDEO_ADAPTIVE_MAX_FACTOR,
+                    std_threshold=config.VIDEO_ADAPTIVE_STD,
+                )
+            
             logger.info(f"🧠 Analizando video (stride: {stride}, duración: {duracion:.1f}s)...")
             
-            # Bucle de análisis
-            for i in range(0, frames_totales, stride):
-                cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-                ret, frame = cap.read()
+            # Bucle de análisis: lectura secuencial con grab(); solo se
+            # decodifican (retrieve) los frames muestreados. Evita los seeks
+            # con CAP_PROP_POS_FRAMES, que reinician el decodificador.
+            siguiente = 0
+            for i in range(frames_totales):
+                if cancelar.is_set():
+                    early_exit = True
+                    logger.info(f"⏹️ Análisis detenido en frame {i} ({frames_con_rostro} rostros)")
+                    break
+                
+                if not cap.grab():
+                    break
+                if i < siguiente:
+                    continue
+                
+                ret, frame = cap.retrieve()
                 if not ret:
                     break
                 
-                # Detectar rostros
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+                if progress is not None:
+                    progress(i / max(frames_totales, 1), desc="Analizando frames")
                 
-                if len(faces) > 0:
+                # Detectar rostros. El tracker solo ve los frames muestreados:
+                # con saltos largos derivaría hacia el fondo, así que se descarta
+                if stride > config.FACE_TRACKING_MAX_STRIDE:
+                    seguimiento.tracker = None
+                    rostro = self._detectar_rostro(frame)
+                else:
+                    rostro = self._detectar_rostro(frame, seguimiento)
+                
+                if rostro is not None:
                     frames_con_rostro += 1
                     
-                    # Procesar primer rostro
-                    x, y, w, h = faces[0]
-                    prob_fake = self._analizar_frame(frame, (x, y, w, h))
-                    
-                    predicciones.append((i, prob_fake))
+                    # Encolar rostro principal para inferencia en lote
+                    try:
+                        pendientes.append((i, self._preparar_rostro(frame, rostro)))
+                    except Exception as e:
+                        logger.error(f"Error analizando frame: {e}")
+                        _registrar(i, 50.0)
                     
-                    # Actualizar máximo
-                    if prob_fake > max_fake_prob:
-                        max_fake_prob = prob_fake
+                    if len(pendientes) >= batch_size:
+                        # Un lote queda en vuelo mientras se decodifica el siguiente
+                        _lanzar_pendientes()
+                        yield from _recoger_en_vuelo(config.VIDEO_PREFETCH_BATCHES)
+                        if sampler is not None:
+                            stride = sampler.stride
+                
+                siguiente = i + stride
             
             cap.release()
             
+            if pendientes:
+                _lanzar_pendientes()
+            yield from _recoger_en_vuelo(0)
+            
+            predicciones = predicciones[:n_pred]
+            probs_values = predicciones["prob"]
+            max_fake_prob = float(probs_values.max()) if n_pred else 0.0
+            
             # Verificar rostros suficientes
             if frames_con_rostro < config.MIN_FACES_REQUIRED:
-                return {
-                    "error": f"Pocos rostros detectados ({frames_con_rostro}). Mínimo requerido: {config.MIN_FACES_REQUIRED}",
-                    "is_deepfake": False,
-                    "probability": 0.0,
-                    "frames_analyzed": frames_con_rostro
+                yield {
+                    "status": "error",
+                    "message": f"Pocos rostros detectados ({frames_con_rostro}). Mínimo requerido: {config.MIN_FACES_REQUIRED}",
+                    "frames_analyzed": frames_con_rostro,
                 }
+                return
             
             # Calcular promedio Top-K
-            if predicciones:
-                probs_values = [p[1] for p in predicciones]
-                probs_values.sort(reverse=True)
-                
-                k = max(1, int(len(probs_values) * 0.1))
-                top_k_values = probs_values[:k]
-                promedio_fake = sum(top_k_values) / len(top_k_values)
+            if n_pred:
+                k = max(1, int(n_pred * 0.1))
+                top_k_values = np.partition(probs_values, n_pred - k)[n_pred - k:]
+                promedio_fake = float(top_k_values.mean(dtype=np.float64))
             else:
                 promedio_fake = 0.0
             
@@ -177,7 +550,8 @@ class VideoForensicsDetector:
             
             logger.info(f"✅ Análisis completado: {'DEEPFAKE' if es_deepfake else 'REAL'} ({promedio_fake:.1f}%)")
             
-            return {
+            yield {
+                "status": "complete",
                 "is_deepfake": es_deepfake,
                 "probability": promedio_fake,
                 "frames_total": frames_totales,
@@ -185,13 +559,39 @@ class VideoForensicsDetector:
                 "duration": duracion,
                 "predictions": predicciones,
                 "max_probability": max_fake_prob,
+                "early_exit": early_exit,
                 "verdict": "DEEPFAKE" if es_deepfake else "REAL"
             }
             
         except Exception as e:
             logger.error(f"❌ Error en análisis de video: {e}", exc_info=True)
+            yield {"status": "error", "message": str(e)}
+
+    def predict(self, video_path: str) -> Dict[str, Any]:
+        """
+        Analiza un video para detectar deepfakes.
+        
+        Args:
+            video_path: Ruta al archivo de video
+            
+        Returns:
+            Diccionario con resultado del análisis
+        """
+        resultado: Dict[str, Any] = {}
+        for resultado in self.predict_stream(video_path):
+            if resultado["status"] != "progress":
+                break
+        
+        if resultado.get("status") != "complete":
             return {
-                "error": str(e),
+                "error": resultado.get("message", "No se obtuvo resultado"),
                 "is_deepfake": False,
-                "probability": 0.0
+                "probability": 0.0,
+                **({"frames_analyzed": resultado["frames_analyzed"]} if "frames_analyzed" in resultado else {}),
             }
+        
+        resultado = dict(resultado)
+        resultado.pop("status")
+        # Lista de pares [frame, prob] para serializar a JSON
+        resultado["predictions"] = resultado["predictions"].tolist()
+        return resultado
@@ -0,0 +1,164 @@
+"""
+Test Suite for the Analysis History Database
+UIDE Forense AI 3.0+
+
+Tests for:
+- SQLite tuning applied by init_db()
+- ts_epoch migration of existing databases
+- Insert / history round-trip
+- Background write queue
+
+Every test runs against a temporary database file, never backend/data.
+"""
+
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend import database
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Point the database module at a throwaway file."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._orig = (database.DB_DIR, database.DB_PATH)
+        database.DB_DIR = Path(self._tmp.name)
+        database.DB_PATH = database.DB_DIR / "forensics.db"
+        database.init_db()
+
+    def tearDown(self):
+        database.close_connection()
+        database.DB_DIR, database.DB_PATH = self._orig
+        self._tmp.cleanup()
+
+
+class TestInitDb(DatabaseTestCase):
+    """Test the PRAGMAs set at initialization."""
+
+    def test_wal_mode_enabled(self):
+        conn = database._get_conn()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+
+
+class TestTimestampMigration(DatabaseTestCase):
+    """Test backfilling ts_epoch on a database created before it existed."""
+
+    def test_iso_timestamps_are_migrated(self):
+        database.DB_PATH = database.DB_DIR / "legacy.db"
+        conn = database._get_conn()
+        conn.execute("""
+            CREATE TABLE analysis_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename TEXT NOT NULL, media_type TEXT NOT NULL,
+                timestamp TEXT NOT NULL, verdict TEXT NOT NULL,
+                ai_probability REAL, meta_1 REAL, meta_2 REAL, notes TEXT,
+                full_report_json TEXT NOT NULL
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO analysis_history (filename, media_type, timestamp, verdict, meta_1, meta_2, full_report_json) "
+            "VALUES (?, 'AUDIO', ?, 'REAL', 1.0, 90.0, '{}')",
+            [("old.wav", "2024-01-01T00:00:00"), ("new.wav", "2024-01-01T00:00:01.500000")],
+        )
+        database.init_db()
+
+        epochs = conn.execute("SELECT ts_epoch FROM analysis_history ORDER BY id").fetchall()
+        self.assertEqual([row[0] for row in epochs], [1704067200000, 1704067201500])
+        self.assertEqual([r["filename"] for r in database.get_history()], ["new.wav", "old.wav"])
+
+
+class TestHistory(DatabaseTestCase):
+    """Test inserting and reading back analyses."""
+
+    def test_insert_and_read_back(self):
+        row_id = database.insert_analysis("clip.mp4", "VIDEO", {
+            "verdict": "DEEPFAKE",
+            "probability": 78.5,
+            "duration": 12.0,
+            "frames_analyzed": 30,
+        })
+        self.assertIsNotNone(row_id)
+
+        history = database.get_history(limit=10)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0]["filename"], "clip.mp4")
+        self.assertEqual(history[0]["ai_probability"], 78.5)
+        self.assertIn('"frames_analyzed":30', history[0]["full_report"])  # raw compact JSON text
+        self.assertNotIn("full_report", database.get_history(include_full=False)[0])
+        self.assertEqual(database.get_stats(), {"total": 1, "by_type": {"VIDEO": 1}})
+
+    def test_filter_by_media_type_uses_index(self):
+        database.insert_analyses_bulk([
+            ("a.wav", "AUDIO", {"verdict": "REAL"}),
+            ("b.mp4", "VIDEO", {"verdict": "REAL"}),
+        ])
+        history = database.get_history(media_type="AUDIO")
+        self.assertEqual([r["filename"] for r in history], ["a.wav"])
+
+        plan = database._get_conn().execute("""
+            EXPLAIN QUERY PLAN
+            SELECT id FROM analysis_history
+            WHERE media_type = 'AUDIO' ORDER BY ts_epoch DESC LIMIT 50
+        """).fetchall()
+        details = " ".join(row[3] for row in plan)
+        self.assertIn("idx_type_epoch", details)
+        self.assertNotIn("TEMP B-TREE", details)
+
+    def test_bulk_insert(self):
+        records = [
+            ("a.wav", "AUDIO", {"verdict": "REAL", "score": 10.0}),
+            ("b.png", "IMAGE", {"verdict": "REAL", "scores": {"unified": 0.1}}),
+        ]
+        self.assertEqual(database.insert_analyses_bulk(records), 2)
+        self.assertEqual(database.get_stats()["total"], 2)
+
+    def test_stats_counters_follow_inserts_and_deletes(self):
+        database.insert_analyses_bulk([
+            ("a.wav", "AUDIO", {"verdict": "REAL"}),
+            ("b.wav", "AUDIO", {"verdict": "REAL"}),
+            ("c.mp4", "VIDEO", {"verdict": "REAL"}),
+        ])
+        database._get_conn().execute("DELETE FROM analysis_history WHERE media_type = 'VIDEO'")
+        self.assertEqual(database.get_stats(), {"total": 2, "by_type": {"AUDIO": 2}})
+
+    def test_bulk_insert_is_atomic(self):
+        records = [
+            ("a.wav", "AUDIO", {"verdict": "REAL"}),
+            ("b.wav", "AUDIO", {"verdict": None}),  # violates NOT NULL
+        ]
+        self.assertEqual(database.insert_analyses_bulk(records), 0)
+        self.assertEqual(database.get_stats()["total"], 0)
+
+    def test_enqueued_analyses_are_written_in_background(self):
+        self.assertTrue(database.enqueue_analysis("a.wav", "AUDIO", {"verdict": "REAL"}))
+        self.assertTrue(database.enqueue_analysis("b.mp4", "VIDEO", {"verdict": "REAL"}))
+        database.flush_writes()
+        self.assertEqual(database.get_stats(), {"total": 2, "by_type": {"AUDIO": 1, "VIDEO": 1}})
+
+    def test_unit_of_work_commits_or_rolls_back_together(self):
+        with database.unit_of_work():
+            database.insert_analysis("a.wav", "AUDIO", {"verdict": "REAL"})
+            database.insert_analysis("b.wav", "AUDIO", {"verdict": "REAL"})
+        with self.assertRaises(RuntimeError):
+            with database.unit_of_work():
+                database.insert_analysis("c.wav", "AUDIO", {"verdict": "REAL"})
+                # A failing nested bulk insert only undoes its own rows
+                database.insert_analyses_bulk([("d.wav", "AUDIO", {"verdict": None})])
+                raise RuntimeError("analysis failed")
+        self.assertEqual(database.get_stats()["total"], 2)
+        self.assertFalse(database._get_conn().in_transaction)
+
+    def test_connection_reused_within_thread(self):
+        self.assertIs(database._get_conn(), database._get_conn())
+
+
+if __name__ == "__main__":
+    unittest.main()
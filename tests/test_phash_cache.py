@@ -0,0 +1,69 @@
+"""
+Test Suite for the Perceptual Hash Cache
+UIDE Forense AI 3.0+
+
+Tests for:
+- pHash stability under rescaling
+- Hamming-distance lookup in PerceptualCache
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from modules.image_forensics.phash_cache import phash, PerceptualCache
+
+
+def _sample_image(seed: int = 0) -> Image.Image:
+    """Blocky random image (low-frequency content survives resizing)."""
+    rng = np.random.default_rng(seed)
+    blocks = (rng.random((32, 32, 3)) * 255).astype(np.uint8)
+    return Image.fromarray(np.kron(blocks, np.ones((8, 8, 1), dtype=np.uint8)))
+
+
+class TestPhash(unittest.TestCase):
+    """Test the 64-bit perceptual hash."""
+
+    def test_rescaled_image_has_small_distance(self):
+        """A resized copy should hash (almost) identically."""
+        image = _sample_image()
+        resized = image.resize((300, 260))
+        self.assertLessEqual((phash(image) ^ phash(resized)).bit_count(), 6)
+
+    def test_different_images_have_large_distance(self):
+        """Unrelated images should be far apart."""
+        self.assertGreater((phash(_sample_image(0)) ^ phash(_sample_image(1))).bit_count(), 6)
+
+
+class TestPerceptualCache(unittest.TestCase):
+    """Test nearest-neighbour lookup and eviction."""
+
+    def test_hit_within_distance(self):
+        cache = PerceptualCache(max_size=4, max_distance=2)
+        cache.put(0b1010, "a")
+        self.assertEqual(cache.get(0b1011), "a")
+
+    def test_miss_beyond_distance(self):
+        cache = PerceptualCache(max_size=4, max_distance=2)
+        cache.put(0b0000, "a")
+        self.assertIsNone(cache.get(0b0111))
+
+    def test_evicts_oldest(self):
+        cache = PerceptualCache(max_size=2, max_distance=0)
+        cache.put(1, "a")
+        cache.put(2, "b")
+        cache.put(3, "c")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(3), "c")
+
+
+if __name__ == "__main__":
+    unittest.main()
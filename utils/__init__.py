@@ -14,6 +14,9 @@ from .file_handlers import (
     Timer,
 )
 
+from .cache import LRUCache, hash_array, hash_file
+from .batcher import MicroBatcher
+
 from .plotting import (
     generar_grafico_temporal,
     generar_gauge_svg,
@@ -31,6 +34,12 @@ __all__ = [
     'generar_reporte_audio',
     'generar_reporte_error',
     'Timer',
+    # Cache
+    'LRUCache',
+    'hash_array',
+    'hash_file',
+    # Batching
+    'MicroBatcher',
     # Plotting
     'generar_grafico_temporal',
     'generar_gauge_svg',
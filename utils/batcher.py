@@ -0,0 +1,84 @@
+"""
+Batcher - Agrupación de solicitudes concurrentes en micro-lotes
+UIDE Forense AI
+
+Cuando varios usuarios analizan imágenes al mismo tiempo, este módulo
+reúne las solicitudes que llegan dentro de una ventana corta y las
+procesa con una sola llamada al detector (un único forward en GPU).
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Agrupa llamadas concurrentes a `submit()` en lotes.
+
+    Un worker en segundo plano espera la primera solicitud, acumula las
+    siguientes durante `window_ms` (o hasta `max_batch`) y ejecuta
+    `batch_fn` en un hilo. Cada resultado se devuelve a su solicitante.
+
+    Args:
+        batch_fn: Función síncrona que recibe una lista y retorna una lista
+                  de resultados en el mismo orden
+        max_batch: Tamaño máximo del lote
+        window_ms: Ventana de espera para completar el lote (milisegundos)
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch: int = 8, window_ms: float = 20.0):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> None:
+        """Crea la cola y el worker en el event loop actual (lazy)."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Encola un elemento y espera su resultado."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            pending: List[Tuple[Any, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self.window
+
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in pending]
+            try:
+                results = await asyncio.to_thread(self.batch_fn, items)
+            except Exception as e:
+                logger.error("❌ Error procesando lote: %s", e, exc_info=True)
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            if len(pending) > 1:
+                logger.info("📦 Lote de %d solicitudes procesado", len(pending))
+
+            for (_, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
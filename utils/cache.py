@@ -0,0 +1,78 @@
+"""
+Cache - Caché LRU de resultados indexada por hash de contenido
+UIDE Forense AI
+
+Este módulo permite reutilizar análisis previos cuando el mismo
+archivo o imagen se envía de nuevo (flujo habitual en demos y evaluaciones).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import numpy as np
+
+# Tamaño de bloque para hashear archivos en streaming
+_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+def hash_array(array: np.ndarray) -> bytes:
+    """
+    Calcula un digest del contenido de un array numpy.
+
+    Incluye shape y dtype para que dos arrays con los mismos bytes
+    pero distinta geometría no colisionen.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str((array.shape, array.dtype.str)).encode())
+    h.update(np.ascontiguousarray(array).data)
+    return h.digest()
+
+
+def hash_file(path: str) -> bytes:
+    """Calcula un digest del contenido de un archivo leyendo bloques de 1 MiB."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+class LRUCache:
+    """
+    Diccionario acotado con política LRU y acceso thread-safe.
+
+    Al superar `max_size` entradas se descarta la menos usada recientemente.
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna el valor cacheado (y lo marca como reciente) o None."""
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Inserta un valor, descartando la entrada más antigua si es necesario."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
@@ -36,6 +36,10 @@ def validar_imagen(imagen_array, tamaño_max_mb: int = config.MAX_IMAGE_SIZE_MB)
         if imagen_array is None:
             return False, "No se proporcionó ninguna imagen"
         
+        # gr.Image(type="numpy") entrega HWC; se rechaza cualquier otra forma
+        if imagen_array.ndim != 3:
+            return False, "Formato de imagen no soportado (se esperaba alto x ancho x canales)"
+        
         # Validar dimensiones mínimas
         if imagen_array.shape[0] < 32 or imagen_array.shape[1] < 32:
             return False, "La imagen es demasiado pequeña (mínimo 32x32 píxeles)"
@@ -436,14 +440,14 @@ class Timer:
         self.fin = None
         
     def __enter__(self):
-        self.inicio = time.time()
+        self.inicio = time.perf_counter()
         return self
         
     def __exit__(self, *args):
-        self.fin = time.time()
+        self.fin = time.perf_counter()
         
     @property
     def duracion(self) -> float:
-        if self.inicio and self.fin:
+        if self.inicio is not None and self.fin is not None:
             return self.fin - self.inicio
         return 0.0
@@ -8,7 +8,9 @@ medidores visuales y líneas de tiempo para reportes.
 
 import io
 import logging
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
+
+import numpy as np
 from PIL import Image
 
 # Matplotlib backend setup for headless environment
@@ -97,22 +99,30 @@ def generar_stat_card(valor, etiqueta: str, icono: str = "📊") -> str:
     """
 
 
-def generar_grafico_temporal(predicciones_por_frame: List[Tuple[int, float]]) -> Optional[Image.Image]:
+def generar_grafico_temporal(
+    predicciones_por_frame: Union[np.ndarray, List[Tuple[int, float]]]
+) -> Optional[Image.Image]:
     """
     Genera un gráfico de línea temporal de probabilidades de fake.
 
     Args:
-        predicciones_por_frame: Lista de tuplas (frame_idx, probabilidad)
+        predicciones_por_frame: Array estructurado con campos "idx"/"prob"
+                                (VideoForensicsDetector) o lista de tuplas
+                                (frame_idx, probabilidad)
 
     Returns:
         Imagen PIL del gráfico o None si hay error
     """
     try:
-        if not predicciones_por_frame:
+        if len(predicciones_por_frame) == 0:
             return None
 
-        frames = [p[0] for p in predicciones_por_frame]
-        probs = [p[1] for p in predicciones_por_frame]
+        if isinstance(predicciones_por_frame, np.ndarray) and predicciones_por_frame.dtype.names:
+            frames = predicciones_por_frame["idx"]
+            probs = predicciones_por_frame["prob"]
+        else:
+            frames = [p[0] for p in predicciones_por_frame]
+            probs = [p[1] for p in predicciones_por_frame]
 
         plt.figure(figsize=(10, 4))
         plt.plot(frames, probs, color=config.COLOR_FAKE, linewidth=2, label="Probabilidad Fake")